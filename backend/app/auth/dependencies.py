@@ -1,6 +1,10 @@
-from fastapi import Depends, HTTPException, status
+import secrets
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.auth.jwt import verify_token
+from app.auth.user_cache import user_cache
+from app.auth.token_versions import token_versions
+from app.core.config import settings
 from app.database.mongodb import get_database
 from app.models.user import User
 from bson import ObjectId
@@ -9,6 +13,73 @@ from typing import Optional
 security = HTTPBearer()
 
 
+async def _load_user(db, email: str) -> Optional[User]:
+    """Get a validated User for a token subject, from the cache when possible"""
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+    
+    user_data = await db.users.find_one({"email": email})
+    if user_data is None:
+        return None
+    
+    # Convert ObjectId to string for the User model
+    if "_id" in user_data:
+        user_data["id"] = str(user_data["_id"])
+        del user_data["_id"]  # Remove the original _id field
+    
+    token_versions.observe(user_data["id"], user_data.get("token_version", 0), user_data.get("is_active", True))
+    user = User(**user_data)
+    user_cache.set(email, user)
+    return user
+
+
+def _user_from_claims(payload: dict) -> Optional[User]:
+    """Build a User from stateless access token claims (None if the token has none).
+
+    The claims carry no profile data, so name and phone are left empty;
+    handlers that need them depend on get_current_active_user_profile.
+    """
+    if not settings.stateless_auth or "uid" not in payload:
+        return None
+    return User(
+        id=payload["uid"],
+        email=payload["sub"],
+        first_name="",
+        last_name="",
+        user_type=payload["typ"],
+        is_active=payload.get("act", True),
+        is_verified=payload.get("vfd", False)
+    )
+
+
+async def _resolve_user(db, payload: dict, full_profile: bool = False) -> Optional[User]:
+    """Resolve the user behind a verified token, or None if unknown or revoked"""
+    email = payload.get("sub")
+    if email is None:
+        return None
+    
+    # Stateless mode: authorise from the claims alone, no database round trip
+    user = None if full_profile else _user_from_claims(payload)
+    if user is None:
+        user = await _load_user(db, email)
+    if user is None:
+        return None
+    
+    # Tokens issued before a password change or deactivation are revoked. The
+    # stored version and active flag are re-read at most every token_state_ttl_seconds,
+    # so a bump made on another worker is enforced here too
+    state = await token_versions.get(db, user.id)
+    if state is None:
+        return None
+    version, is_active = state
+    if payload.get("ver", 0) < version:
+        return None
+    if user.is_active and not is_active:
+        user = user.model_copy(update={"is_active": False})
+    return user
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db = Depends(get_database)
@@ -26,8 +97,7 @@ async def get_current_user(
             print("Token verification failed: invalid signature or expired")
             raise credentials_exception
             
-        email: str = payload.get("sub")
-        if email is None:
+        if payload.get("sub") is None:
             print("Token payload missing 'sub' field")
             raise credentials_exception
             
@@ -35,18 +105,36 @@ async def get_current_user(
         print(f"Token validation error: {e}")
         raise credentials_exception
     
-    # Get user from database
-    user_data = await db.users.find_one({"email": email})
-    if user_data is None:
-        print(f"User not found for email: {email}")
+    # Get user from token claims, cache or database
+    user = await _resolve_user(db, payload)
+    if user is None:
+        print(f"User not found or token revoked for: {payload.get('sub')}")
         raise credentials_exception
-    
-    # Convert ObjectId to string for the User model
-    if "_id" in user_data:
-        user_data["id"] = str(user_data["_id"])
-        del user_data["_id"]  # Remove the original _id field
         
-    return User(**user_data)
+    return user
+
+
+async def get_current_user_profile(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db = Depends(get_database)
+) -> User:
+    """Get the current user's full stored profile.
+
+    In stateless mode the claims-only User lacks fields such as favourites and
+    profile_image, so endpoints that return the profile load the full document.
+    """
+    current_user = await get_current_user(credentials, db)
+    if not settings.stateless_auth:
+        return current_user
+    
+    user = await _load_user(db, current_user.email)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
 
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
@@ -56,6 +144,13 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 
+async def get_current_active_user_profile(current_user: User = Depends(get_current_user_profile)) -> User:
+    """Get current active user's full stored profile"""
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
 async def get_current_landlord(current_user: User = Depends(get_current_active_user)) -> User:
     """Get current landlord user"""
     if current_user.user_type != "landlord":
@@ -66,6 +161,14 @@ async def get_current_landlord(current_user: User = Depends(get_current_active_u
     return current_user
 
 
+async def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    """Allow internal metrics only to callers holding METRICS_TOKEN (404 when metrics are disabled)"""
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_metrics_token or not secrets.compare_digest(x_metrics_token, settings.metrics_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid metrics token")
+
+
 async def get_optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db = Depends(get_database)
@@ -79,19 +182,6 @@ async def get_optional_current_user(
         if payload is None:
             return None
             
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-            
-        user_data = await db.users.find_one({"email": email})
-        if user_data is None:
-            return None
-        
-        # Convert ObjectId to string for the User model
-        if "_id" in user_data:
-            user_data["id"] = str(user_data["_id"])
-            del user_data["_id"]  # Remove the original _id field
-            
-        return User(**user_data)
+        return await _resolve_user(db, payload)
     except Exception:
         return None
\ No newline at end of file
@@ -0,0 +1,104 @@
+import asyncio
+import re
+import time
+import httpx
+from google.auth import jwt as google_jwt
+from typing import Dict, Optional
+from app.core.config import settings
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+# Fallback lifetime when Google's response has no usable Cache-Control max-age
+DEFAULT_MAX_AGE_SECONDS = 3600
+# Refresh this long before the cached certificates expire
+REFRESH_MARGIN_SECONDS = 300
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class GoogleCertCache:
+    """In-memory cache of Google's ID token signing certificates.
+
+    Certificates are fetched with an async HTTP client and kept for as long as
+    Google's Cache-Control max-age allows, with a background task refreshing
+    them shortly before they expire. ID tokens are then verified locally, off
+    the event loop, without an outbound call per login. An unknown key id
+    triggers one immediate refresh to pick up a key rotation.
+    """
+
+    def __init__(self, certs_url: Optional[str] = None):
+        # Overridable so tests can serve a local key set
+        self.certs_url = certs_url or settings.google_certs_url
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.fetch_count = 0
+
+    async def _fetch(self):
+        """Download the certificate set and record when it expires"""
+        async with httpx.AsyncClient(timeout=10) as client:
+            response = await client.get(self.certs_url)
+            response.raise_for_status()
+
+        match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else DEFAULT_MAX_AGE_SECONDS
+        self._certs = response.json()
+        self._expires_at = time.monotonic() + max_age
+        self.fetch_count += 1
+
+    async def get_certs(self, force_refresh: bool = False) -> Dict[str, str]:
+        """Cached certificates, fetching them if missing or expired"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if force_refresh or time.monotonic() >= self._expires_at:
+            async with self._lock:
+                # Another request may have refreshed while we waited
+                if force_refresh or time.monotonic() >= self._expires_at:
+                    await self._fetch()
+        return self._certs
+
+    async def verify(self, token: str, audience: Optional[str]) -> dict:
+        """Verify a Google ID token and return its claims (raises ValueError if invalid)"""
+        certs = await self.get_certs()
+        key_id = google_jwt.decode_header(token).get("kid")
+        if key_id and key_id not in certs:
+            certs = await self.get_certs(force_refresh=True)
+
+        loop = asyncio.get_running_loop()
+        claims = await loop.run_in_executor(
+            None,
+            lambda: google_jwt.decode(token, certs=certs, audience=audience, clock_skew_in_seconds=10)
+        )
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {claims.get('iss')}")
+        return claims
+
+    def start_background_refresh(self):
+        """Keep the certificates warm so logins never wait on a fetch"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop_background_refresh(self):
+        """Stop the refresh task"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _refresh_loop(self):
+        """Refresh the certificates shortly before they expire"""
+        while True:
+            try:
+                await self.get_certs(force_refresh=True)
+                delay = max(self._expires_at - time.monotonic() - REFRESH_MARGIN_SECONDS, 60)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Google certificate refresh failed: {e}")
+                delay = 60
+            await asyncio.sleep(delay)
+
+
+google_cert_cache = GoogleCertCache()
@@ -1,12 +1,29 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import secrets
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min/max rounds to the configured cost makes passlib flag hashes made
+# with any other cost as needing an update, so they are rehashed on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds
+)
+
+# bcrypt releases the GIL while hashing, so a small thread pool keeps the
+# event loop free and caps how many CPU cores password work can occupy
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -19,6 +36,48 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password pool instead of the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the password pool instead of the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and, if its hash uses an outdated cost, return a new hash.
+
+    Returns (verified, new_hash); new_hash is None when no rehash is needed.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def access_token_claims(user: dict) -> dict:
+    """Claims for a user's access token.
+
+    Every token carries the subject and the user's token_version. In
+    stateless mode the claims also hold enough of the user for
+    get_current_user to authorise without a database lookup. They hold only
+    the id, type and status flags, never personal data such as names or
+    phone numbers. Bearer tokens show up in proxy and header logs, and they
+    would keep stale values after a profile edit.
+    """
+    claims = {"sub": user["email"], "ver": user.get("token_version", 0)}
+    if settings.stateless_auth:
+        claims.update({
+            "uid": str(user["_id"]),
+            "typ": user["user_type"],
+            "act": user.get("is_active", True),
+            "vfd": user.get("is_verified", False)
+        })
+    return claims
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
@@ -0,0 +1,105 @@
+import hashlib
+from bson import ObjectId
+from datetime import datetime
+from pymongo import ReturnDocument
+from typing import List, Optional, Tuple
+from app.auth.jwt import create_refresh_token, create_refresh_token_expiry
+
+# Longest user agent string stored on a session
+MAX_USER_AGENT_LENGTH = 256
+
+
+def hash_refresh_token(refresh_token: str) -> str:
+    """SHA-256 digest stored in place of the raw refresh token"""
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+class SessionStore:
+    """Refresh token sessions, one document per signed-in device.
+
+    Only a SHA-256 hash of each refresh token is stored, under a unique
+    index, so refreshing is a single indexed lookup and a leaked database
+    does not leak usable tokens. Rotation swaps the hash in one
+    find_one_and_update, so a refresh token can be used at most once even
+    under concurrent requests. expires_at is backed by a TTL index, so
+    MongoDB purges expired sessions itself.
+    """
+
+    async def create(
+        self,
+        db,
+        user_id,
+        user_agent: Optional[str] = None,
+        ip_address: Optional[str] = None
+    ) -> Tuple[str, dict]:
+        """Start a session and return its refresh token and document"""
+        refresh_token = create_refresh_token()
+        now = datetime.utcnow()
+        session = {
+            "_id": ObjectId(),
+            "user_id": ObjectId(user_id),
+            "token_hash": hash_refresh_token(refresh_token),
+            "user_agent": (user_agent or "")[:MAX_USER_AGENT_LENGTH],
+            "ip_address": ip_address,
+            "created_at": now,
+            "last_used_at": now,
+            "expires_at": create_refresh_token_expiry()
+        }
+        await db.sessions.insert_one(session)
+        return refresh_token, session
+
+    async def rotate(
+        self,
+        db,
+        refresh_token: str,
+        ip_address: Optional[str] = None
+    ) -> Optional[Tuple[str, dict]]:
+        """Swap a live refresh token for a new one.
+
+        Returns the new token and the updated session, or None if the token
+        is unknown, already rotated, revoked or expired.
+        """
+        new_refresh_token = create_refresh_token()
+        now = datetime.utcnow()
+        update = {
+            "token_hash": hash_refresh_token(new_refresh_token),
+            "last_used_at": now,
+            "expires_at": create_refresh_token_expiry()
+        }
+        if ip_address:
+            update["ip_address"] = ip_address
+        session = await db.sessions.find_one_and_update(
+            # The TTL monitor runs about once a minute, so check expiry here too
+            {"token_hash": hash_refresh_token(refresh_token), "expires_at": {"$gt": now}},
+            {"$set": update},
+            return_document=ReturnDocument.AFTER
+        )
+        if session is None:
+            return None
+        return new_refresh_token, session
+
+    async def list_for_user(self, db, user_id) -> List[dict]:
+        """Live sessions for a user, most recently used first"""
+        cursor = db.sessions.find(
+            {"user_id": ObjectId(user_id), "expires_at": {"$gt": datetime.utcnow()}},
+            {"token_hash": 0}
+        ).sort("last_used_at", -1)
+        return await cursor.to_list(length=None)
+
+    async def revoke(self, db, user_id, session_id) -> bool:
+        """End one of a user's sessions"""
+        result = await db.sessions.delete_one({"_id": ObjectId(session_id), "user_id": ObjectId(user_id)})
+        return result.deleted_count > 0
+
+    async def revoke_token(self, db, refresh_token: str) -> bool:
+        """End the session a refresh token belongs to (logout)"""
+        result = await db.sessions.delete_one({"token_hash": hash_refresh_token(refresh_token)})
+        return result.deleted_count > 0
+
+    async def revoke_all(self, db, user_id) -> int:
+        """End every session for a user, e.g. after a password change"""
+        result = await db.sessions.delete_many({"user_id": ObjectId(user_id)})
+        return result.deleted_count
+
+
+session_store = SessionStore()
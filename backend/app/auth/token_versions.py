@@ -0,0 +1,75 @@
+import time
+from bson import ObjectId
+from collections import OrderedDict
+from datetime import datetime
+from pymongo import ReturnDocument
+from typing import Optional, Tuple
+from app.core.config import settings
+
+
+class TokenVersions:
+    """Per-user token_version and is_active, cached briefly from MongoDB.
+
+    Every access token carries the user's token_version. Changing a password
+    or deactivating an account increments the counter in MongoDB, which
+    revokes every token issued before it. Each worker caches the stored
+    version and active flag for token_state_ttl_seconds and then reads them
+    again, so a bump made on any worker is enforced everywhere within that
+    bound. This holds even in stateless mode, where requests never load the
+    full user. The worker that made the bump sees it immediately.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        # user_id -> (token_version, is_active, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def observe(self, user_id: str, version: int, is_active: bool = True):
+        """Record the state seen on a freshly loaded user document"""
+        entry = self._entries.get(user_id)
+        # Never step back to an older version read before a concurrent bump
+        if entry is not None and entry[0] > version:
+            version = entry[0]
+        self._entries[user_id] = (version, is_active, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, db, user_id: str) -> Optional[Tuple[int, bool]]:
+        """(token_version, is_active) for a user, or None if the user no longer exists"""
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[2] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0], entry[1]
+
+        self.misses += 1
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, {"token_version": 1, "is_active": 1})
+        if user is None:
+            self._entries.pop(user_id, None)
+            return None
+        self.observe(user_id, user.get("token_version", 0), user.get("is_active", True))
+        version, is_active, _ = self._entries[user_id]
+        return version, is_active
+
+    async def bump(self, db, user_id: str) -> int:
+        """Increment a user's token_version, revoking all their existing tokens"""
+        user = await db.users.find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$inc": {"token_version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"token_version": 1, "is_active": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        version = user.get("token_version", 0) if user else 0
+        self.observe(str(user_id), version, user.get("is_active", True) if user else False)
+        return version
+
+    def metrics(self) -> dict:
+        """Hit/miss counters and current size"""
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_versions = TokenVersions(settings.token_state_ttl_seconds, settings.user_cache_max_size)
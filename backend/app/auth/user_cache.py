@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.core.config import settings
+from app.models.user import User
+
+
+class UserCache:
+    """In-process TTL + LRU cache of validated User models keyed by token subject.
+
+    Saves get_current_user a users lookup and a model validation on every
+    authenticated request. Entries expire after ttl_seconds, and routes that
+    change a user call invalidate() so their next request sees fresh data.
+    Each worker process holds its own copy, so the TTL bounds staleness
+    across workers.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, subject: str) -> Optional[User]:
+        """Cached user for a subject, or None on a miss or expired entry"""
+        entry = self._entries.get(subject)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[subject]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(subject)
+        self.hits += 1
+        return user
+
+    def set(self, subject: str, user: User):
+        """Cache a user, evicting the least recently used entry when full"""
+        if self.max_size <= 0:
+            return
+        self._entries[subject] = (user, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(subject)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, subject: str):
+        """Drop a user after their profile, password, status or favourites change"""
+        if self._entries.pop(subject, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry"""
+        self._entries.clear()
+
+    def metrics(self) -> dict:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+user_cache = UserCache(settings.user_cache_ttl_seconds, settings.user_cache_max_size)
@@ -6,12 +6,29 @@ class Settings(BaseSettings):
     # Database
     mongodb_url: str = "mongodb://localhost:27017"
     database_name: str = "wild_welcome"
+    auto_create_indexes: bool = True
     
     # JWT
     secret_key: str = "your-super-secret-key-change-this-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 30
+    # Embed user claims in access tokens so authorisation skips the users lookup
+    stateless_auth: bool = False
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    user_cache_ttl_seconds: float = 60
+    user_cache_max_size: int = 10000
+    # How long a worker trusts its cached token_version/is_active before re-reading the user
+    token_state_ttl_seconds: float = 30
+    
+    # Rate limiting (backend: "memory" per process, or "mongo" shared by all workers)
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"
+    rate_limit_trust_forwarded_for: bool = False
+    
+    # /metrics is only served to requests sending this value as X-Metrics-Token (disabled when unset)
+    metrics_token: Optional[str] = None
     
     # Cloudinary
     cloudinary_cloud_name: str
@@ -24,17 +41,48 @@ class Settings(BaseSettings):
     email_host_user: str
     email_host_password: str
     email_use_tls: bool = True
+    email_pool_size: int = 4
+    email_connection_max_age_seconds: float = 300
+    email_connection_max_messages: int = 100
+    email_connection_idle_check_seconds: float = 30
+    
+    # Notification outbox
+    notification_workers: int = 4
+    notification_max_attempts: int = 5
+    notification_retry_base_seconds: float = 30
+    notification_poll_interval_seconds: float = 1.0
+    
+    # Platform stats (0 disables the periodic recount)
+    stats_reconcile_interval_seconds: float = 3600
+    
+    # Homepage snapshot
+    home_snapshot_refresh_seconds: float = 60
+    home_cache_max_age_seconds: int = 30
+    facet_cache_ttl_seconds: float = 300
+    # GET /properties/{id}/bundle: server-side cache and client Cache-Control max-age
+    bundle_cache_ttl_seconds: float = 30
+    bundle_cache_max_size: int = 1000
+    bundle_cache_max_age_seconds: int = 15
+    # Serve listing and search from an in-memory NumPy copy of the catalog (needs numpy)
+    columnar_search: bool = False
+    columnar_reload_seconds: float = 300
+    # How often each worker reloads its in-memory index of booked dates
+    availability_reload_seconds: float = 60
     
     # SMS
     gupshup_api_key: str
     gupshup_app_name: str
     gupshup_base_url: str = "https://api.gupshup.io/sm/api/v1"
+    sms_timeout_seconds: float = 10
+    sms_max_connections: int = 10
+    sms_max_concurrency: int = 10
     
     # CORS
     frontend_url: str = "http://localhost:3000"
     
     # Google OAuth
     google_client_id: Optional[str] = None
+    google_certs_url: str = "https://www.googleapis.com/oauth2/v1/certs"
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,269 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from typing import Dict, List
+
+
+# Declarative index registry: collection name -> index specs.
+# Every query shape issued by the routes should be covered here so that no
+# request path falls back to a collection scan. Each spec is passed straight
+# to pymongo's IndexModel, so any create_index option (unique, sparse,
+# partialFilterExpression, expireAfterSeconds, ...) can be used.
+INDEXES: Dict[str, List[dict]] = {
+    "users": [
+        # get_current_user, login, register, forgot/reset password
+        {"keys": [("email", ASCENDING)], "name": "email_unique", "unique": True},
+        # Stats reconciliation user and landlord counts
+        {"keys": [("is_active", ASCENDING), ("user_type", ASCENDING)], "name": "active_user_type"},
+    ],
+    "sessions": [
+        # refresh_access_token rotation and logout
+        {"keys": [("token_hash", ASCENDING)], "name": "token_hash_unique", "unique": True},
+        # GET /auth/sessions, revoke and revoke-all
+        {"keys": [("user_id", ASCENDING), ("last_used_at", DESCENDING)], "name": "user_last_used"},
+        # Expired sessions are purged by MongoDB
+        {"keys": [("expires_at", ASCENDING)], "name": "expires_ttl", "expireAfterSeconds": 0},
+    ],
+    "rate_limits": [
+        # Shared rate limiter windows are looked up by _id; old windows expire
+        {"keys": [("expires_at", ASCENDING)], "name": "expires_ttl", "expireAfterSeconds": 0},
+    ],
+    "properties": [
+        # GET /properties and /properties/search: equality on is_active and
+        # property_type first, then the price/guest range predicates
+        {
+            "keys": [
+                ("is_active", ASCENDING),
+                ("property_type", ASCENDING),
+                ("price_per_night", ASCENDING),
+                ("max_guests", ASCENDING),
+            ],
+            "name": "active_type_price_guests",
+        },
+        {
+            "keys": [("is_active", ASCENDING), ("price_per_night", ASCENDING), ("max_guests", ASCENDING)],
+            "name": "active_price_guests",
+        },
+        # location and near_park filters: exact matches on the normalized keys
+        {
+            "keys": [("is_active", ASCENDING), ("location.city_key", ASCENDING), ("price_per_night", ASCENDING)],
+            "name": "active_city_key_price",
+        },
+        {
+            "keys": [("is_active", ASCENDING), ("location.near_park_key", ASCENDING), ("price_per_night", ASCENDING)],
+            "name": "active_park_key_price",
+        },
+        # The location filter matches the city key OR this address key
+        {
+            "keys": [("is_active", ASCENDING), ("location.address_key", ASCENDING), ("price_per_night", ASCENDING)],
+            "name": "active_address_key_price",
+        },
+        # Amenity searches: the $bitsAllSet/$bitsAnySet test runs on the index
+        # keys, so non-matching properties are never fetched
+        {"keys": [("is_active", ASCENDING), ("amenities_mask", ASCENDING)], "name": "active_amenities_mask"},
+        # GET /properties?sort=rating and min_rating filters, best rated first
+        {
+            "keys": [("is_active", ASCENDING), ("rating_avg", DESCENDING), ("_id", DESCENDING)],
+            "name": "active_rating",
+        },
+        # Free-text q search, ranked by weighted relevance
+        {
+            "keys": [
+                ("title", "text"),
+                ("description", "text"),
+                ("location.city", "text"),
+                ("location.address", "text"),
+                ("location.near_park", "text"),
+            ],
+            "name": "property_text",
+            "weights": {
+                "title": 10,
+                "location.city": 5,
+                "location.near_park": 3,
+                "location.address": 2,
+                "description": 1,
+            },
+        },
+        # Radius and bounding-box search in search_properties
+        {"keys": [("location.geo", "2dsphere"), ("is_active", ASCENDING)], "name": "location_geo"},
+        # Landlord dashboards and landlord booking requests
+        {"keys": [("landlord_id", ASCENDING), ("created_at", DESCENDING)], "name": "landlord_created"},
+        # Featured listings on the homepage
+        {
+            "keys": [("is_featured", ASCENDING), ("created_at", DESCENDING)],
+            "name": "featured_created",
+            "partialFilterExpression": {"is_featured": True, "is_active": True},
+        },
+    ],
+    "bookings": [
+        # Overlapping booking lookups by property and date
+        {
+            "keys": [
+                ("property_id", ASCENDING),
+                ("status", ASCENDING),
+                ("check_in", ASCENDING),
+                ("check_out", ASCENDING),
+            ],
+            "name": "property_status_dates",
+        },
+        # get_user_bookings and the per-user duplicate booking check
+        {"keys": [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], "name": "user_created"},
+        {
+            "keys": [("user_id", ASCENDING), ("property_id", ASCENDING), ("status", ASCENDING)],
+            "name": "user_property_status",
+        },
+        # get_landlord_booking_requests: property_id $in, newest first
+        {
+            "keys": [("property_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            "name": "property_created",
+        },
+        # Stats reconciliation booking counts
+        {"keys": [("status", ASCENDING)], "name": "status"},
+    ],
+    "booking_nights": [
+        # One claim per property per night - makes double booking impossible
+        {
+            "keys": [("property_id", ASCENDING), ("night", ASCENDING)],
+            "name": "property_night_unique",
+            "unique": True,
+        },
+        # Releasing claims on cancel or reject
+        {"keys": [("booking_id", ASCENDING)], "name": "booking"},
+    ],
+    "notification_outbox": [
+        # Workers claim the oldest due message, or one whose lease expired
+        {"keys": [("status", ASCENDING), ("next_attempt_at", ASCENDING)], "name": "status_next_attempt"},
+        {"keys": [("status", ASCENDING), ("locked_until", ASCENDING)], "name": "status_lease"},
+        {
+            "keys": [("dedupe_key", ASCENDING)],
+            "name": "dedupe_key_unique",
+            "unique": True,
+            "partialFilterExpression": {"dedupe_key": {"$type": "string"}},
+        },
+        # Delivered messages are purged after a week
+        {"keys": [("sent_at", ASCENDING)], "name": "sent_ttl", "expireAfterSeconds": 7 * 24 * 3600},
+    ],
+    "reviews": [
+        # get_reviews default listing (created_at, _id is the keyset pagination order)
+        {"keys": [("is_approved", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], "name": "approved_created"},
+        {
+            "keys": [
+                ("property_id", ASCENDING),
+                ("is_approved", ASCENDING),
+                ("created_at", DESCENDING),
+                ("_id", DESCENDING),
+            ],
+            "name": "property_approved_created",
+        },
+        # get_featured_reviews
+        {
+            "keys": [("created_at", DESCENDING)],
+            "name": "featured_created",
+            "partialFilterExpression": {"is_featured": True, "is_approved": True},
+        },
+        # Duplicate review checks in create_review
+        {
+            "keys": [("user_id", ASCENDING), ("booking_id", ASCENDING), ("stage", ASCENDING)],
+            "name": "user_booking_stage",
+        },
+        {"keys": [("user_id", ASCENDING), ("property_id", ASCENDING)], "name": "user_property"},
+    ],
+}
+
+# Options compared when checking a live index against its registry spec
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _index_model(spec: dict) -> IndexModel:
+    """Build a pymongo IndexModel from a registry spec"""
+    options = {k: v for k, v in spec.items() if k != "keys"}
+    return IndexModel(spec["keys"], **options)
+
+
+def _normalize_key(key) -> list:
+    """Normalize an index key (SON, dict or list of pairs) to a list of pairs"""
+    items = key.items() if hasattr(key, "items") else key
+    return [(field, direction) for field, direction in items]
+
+
+def _spec_matches(spec: dict, info: dict) -> bool:
+    """Check whether a live index (from index_information) matches a registry spec"""
+    # Text indexes are stored as _fts/_ftsx keys, compare their weights instead
+    if any(direction == "text" for _, direction in spec["keys"]):
+        expected_weights = spec.get("weights") or {field: 1 for field, _ in spec["keys"]}
+        return dict(info.get("weights", {})) == expected_weights
+
+    if _normalize_key(info["key"]) != [(field, direction) for field, direction in spec["keys"]]:
+        return False
+
+    for option in _COMPARED_OPTIONS:
+        expected = spec.get(option)
+        actual = info.get(option)
+        if option in ("unique", "sparse"):
+            expected, actual = bool(expected), bool(actual)
+        if expected != actual:
+            return False
+    return True
+
+
+async def get_index_drift(db) -> Dict[str, dict]:
+    """Compare the registry against the indexes that actually exist in the database.
+
+    Returns a mapping of collection -> {"missing", "mismatched", "extra"} index names.
+    Collections without drift are omitted.
+    """
+    drift = {}
+    for collection_name, specs in INDEXES.items():
+        existing = await db[collection_name].index_information()
+        existing.pop("_id_", None)
+
+        missing, mismatched = [], []
+        for spec in specs:
+            info = existing.get(spec["name"])
+            if info is None:
+                missing.append(spec["name"])
+            elif not _spec_matches(spec, info):
+                mismatched.append(spec["name"])
+
+        expected_names = {spec["name"] for spec in specs}
+        extra = sorted(name for name in existing if name not in expected_names)
+
+        if missing or mismatched or extra:
+            drift[collection_name] = {"missing": missing, "mismatched": mismatched, "extra": extra}
+    return drift
+
+
+async def ensure_indexes(db, drop_mismatched: bool = False) -> Dict[str, List[str]]:
+    """Create every registered index. Safe to run repeatedly.
+
+    Existing indexes with the same name and options are left untouched. An
+    index whose options have changed is reported and skipped unless
+    drop_mismatched is set, in which case it is dropped and rebuilt.
+    Returns a mapping of collection -> index names that were created or rebuilt.
+    """
+    drift = await get_index_drift(db)
+    applied = {}
+
+    for collection_name, specs in INDEXES.items():
+        collection_drift = drift.get(collection_name, {})
+        mismatched = set(collection_drift.get("mismatched", []))
+        to_create = []
+
+        for spec in specs:
+            if spec["name"] in mismatched:
+                if not drop_mismatched:
+                    print(f"Index {collection_name}.{spec['name']} differs from registry, skipping (rebuild with manage_indexes.py --rebuild)")
+                    continue
+                await db[collection_name].drop_index(spec["name"])
+            elif spec["name"] not in collection_drift.get("missing", []):
+                continue
+            to_create.append(_index_model(spec))
+
+        if not to_create:
+            continue
+
+        try:
+            applied[collection_name] = await db[collection_name].create_indexes(to_create)
+        except OperationFailure as e:
+            print(f"Failed to create indexes on {collection_name}: {e}")
+
+    return applied
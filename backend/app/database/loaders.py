@@ -0,0 +1,76 @@
+import asyncio
+from bson import ObjectId
+from fastapi import Depends
+from typing import Dict, Iterable, List, Optional
+from app.database.mongodb import get_database
+
+
+class BatchLoader:
+    """Request-scoped DataLoader for one collection.
+
+    Every load() issued in the same event-loop tick is collected and resolved
+    with a single {"_id": {"$in": [...]}} query, and results are cached for the
+    rest of the request, so resolving N related documents costs one round trip
+    instead of N.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._cache: Dict[ObjectId, Optional[dict]] = {}
+        self._pending: Dict[ObjectId, asyncio.Future] = {}
+        self._dispatch_scheduled = False
+
+    def prime(self, document: dict):
+        """Seed the cache with a document the caller already fetched"""
+        self._cache[document["_id"]] = document
+
+    async def load(self, key) -> Optional[dict]:
+        """Load one document by _id (None if it does not exist)"""
+        key = ObjectId(key)
+        if key in self._cache:
+            return self._cache[key]
+
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending[key] = future
+            if not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        return await future
+
+    async def load_many(self, keys: Iterable) -> List[Optional[dict]]:
+        """Load several documents by _id in one batch, preserving order"""
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    async def _dispatch(self):
+        """Resolve every pending key with one query"""
+        pending, self._pending = self._pending, {}
+        self._dispatch_scheduled = False
+        try:
+            documents = await self.collection.find({"_id": {"$in": list(pending)}}).to_list(None)
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        found = {document["_id"]: document for document in documents}
+        for key, future in pending.items():
+            self._cache[key] = found.get(key)
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+class Loaders:
+    """Batch loaders shared by everything that handles a single request"""
+
+    def __init__(self, db):
+        self.users = BatchLoader(db.users)
+        self.properties = BatchLoader(db.properties)
+
+
+async def get_loaders(db = Depends(get_database)) -> Loaders:
+    """Per-request loaders (FastAPI caches dependencies within a request)"""
+    return Loaders(db)
@@ -16,6 +16,13 @@ async def connect_to_mongo():
     mongo_db.database = mongo_db.client[settings.database_name]
     print(f"Connected to MongoDB: {settings.database_name}")
 
+    # Build any missing indexes so no route falls back to a collection scan
+    if settings.auto_create_indexes:
+        from app.database.indexes import ensure_indexes
+        created = await ensure_indexes(mongo_db.database)
+        for collection_name, names in created.items():
+            print(f"Created indexes on {collection_name}: {', '.join(names)}")
+
 
 async def close_mongo_connection():
     """Close database connection"""
@@ -1,8 +1,23 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.database.mongodb import connect_to_mongo, close_mongo_connection
-from app.routes import auth, users, properties, bookings, reviews
+from app.database.mongodb import connect_to_mongo, close_mongo_connection, get_database
+from app.services.availability_service import availability_index
+from app.services.location_index import location_index
+from app.services.notification_outbox import notification_outbox
+from app.services.email_service import email_service
+from app.services.sms_service import sms_service
+from app.auth.user_cache import user_cache
+from app.auth.token_versions import token_versions
+from app.services.rate_limiter import rate_limiter
+from app.services.stats_service import stats_service
+from app.services.home_service import home_snapshot
+from app.services.facet_service import facet_cache
+from app.services.catalog_engine import catalog_engine
+from app.services.bundle_service import bundle_cache
+from app.auth.google_certs import google_cert_cache
+from app.auth.dependencies import require_metrics_token
+from app.routes import auth, users, properties, bookings, reviews, home
 
 # Create FastAPI app
 app = FastAPI(
@@ -18,6 +33,7 @@ app.add_middleware(
     allow_credentials=False,  # Must be False with allow_origins=["*"]
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -26,14 +42,35 @@ app.include_router(users.router, prefix="/api")
 app.include_router(properties.router, prefix="/api")
 app.include_router(bookings.router, prefix="/api")
 app.include_router(reviews.router, prefix="/api")
+app.include_router(home.router, prefix="/api")
 
 # Database connection events
 @app.on_event("startup")
 async def startup_db_client():
     await connect_to_mongo()
+    db = await get_database()
+    await availability_index.load(db)
+    availability_index.start(db)
+    await location_index.load(db)
+    if settings.columnar_search:
+        await catalog_engine.load(db)
+        catalog_engine.start(db)
+    notification_outbox.start(db)
+    stats_service.start(db)
+    home_snapshot.start(db)
+    if settings.google_client_id:
+        google_cert_cache.start_background_refresh()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await google_cert_cache.stop_background_refresh()
+    await notification_outbox.stop()
+    await stats_service.stop()
+    await home_snapshot.stop()
+    await catalog_engine.stop()
+    await availability_index.stop()
+    email_service.pool.close_all()
+    await sms_service.close()
     await close_mongo_connection()
 
 # Root endpoint
@@ -53,6 +90,22 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": "2025-01-20", "service": "Wild Welcome API"}
 
+# Metrics endpoint (internal: requires X-Metrics-Token)
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+@app.get("/api/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    db = await get_database()
+    return {
+        "notifications": await notification_outbox.metrics(db),
+        "user_cache": user_cache.metrics(),
+        "token_versions": token_versions.metrics(),
+        "rate_limiter": rate_limiter.metrics(),
+        "home_snapshot": home_snapshot.metrics(),
+        "facet_cache": {"hits": facet_cache.hits, "misses": facet_cache.misses},
+        "catalog_engine": catalog_engine.metrics(),
+        "bundle_cache": bundle_cache.metrics()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
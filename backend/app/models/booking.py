@@ -72,4 +72,9 @@ class BookingResponse(BaseModel):
     user_email: Optional[str] = None
     user_phone: Optional[str] = None
     landlord_name: Optional[str] = None
-    landlord_email: Optional[str] = None
\ No newline at end of file
+    landlord_email: Optional[str] = None
+
+
+class BookedRange(BaseModel):
+    check_in: datetime
+    check_out: datetime
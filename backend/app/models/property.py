@@ -1,8 +1,10 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List, Union
 from datetime import datetime
 from bson import ObjectId
-from app.models.user import PyObjectId
+from app.models.user import PyObjectId, PublicProfile
+from app.models.review import Review
+from app.models.booking import BookedRange
 
 
 class Location(BaseModel):
@@ -86,6 +88,10 @@ class Property(PropertyBase):
     landlord_id: str = Field(...)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    distance_km: Optional[float] = None  # Only set by geo searches
+    rating_avg: float = 0.0  # Approved reviews only; 0 until the first review
+    rating_count: int = 0
+    rating_histogram: Dict[str, int] = Field(default_factory=dict)  # "1".."5" -> count
     
     class Config:
         populate_by_name = True
@@ -93,7 +99,63 @@ class Property(PropertyBase):
         json_encoders = {ObjectId: str}
 
 
+class PropertyCard(BaseModel):
+    # Slim listing row returned by list endpoints with view=card
+    id: str
+    title: str
+    property_type: str
+    price_per_night: float
+    image: Optional[str] = None  # First image only
+    city: Optional[str] = None
+    near_park: Optional[str] = None
+    rating_avg: float = 0.0
+    rating_count: int = 0
+    distance_km: Optional[float] = None  # Only set by geo searches
+
+
+class PropertyBundle(BaseModel):
+    property: Property
+    landlord: Optional[PublicProfile] = None
+    reviews: List[Review]  # Latest approved reviews; aggregates are property.rating_*
+    booked: List[BookedRange]  # Merged pending/confirmed stays in the next 90 days
+
+
+class LocationSuggestion(BaseModel):
+    type: str  # city, park or address
+    label: str
+    key: str  # Pass city and address keys back as the location filter, park keys as near_park
+    count: int
+
+
+class FacetValue(BaseModel):
+    value: str
+    label: Optional[str] = None
+    count: int
+
+
+class FacetBand(BaseModel):
+    min: float
+    max: Optional[float] = None  # None for the open-ended top band
+    count: int
+
+
+class SearchFacets(BaseModel):
+    total: int
+    property_type: List[FacetValue]
+    near_park: List[FacetValue]
+    price: List[FacetBand]
+    guests: List[FacetBand]
+    amenities: Dict[str, int]
+
+
+class PropertySearchPage(BaseModel):
+    results: List[Union[Property, PropertyCard]]
+    facets: SearchFacets
+    next_cursor: Optional[str] = None
+
+
 class PropertySearch(BaseModel):
+    q: Optional[str] = Field(None, min_length=1, max_length=200)  # Free text, relevance ranked
     location: Optional[str] = None
     near_park: Optional[str] = None
     max_guests: Optional[int] = None
@@ -101,5 +163,10 @@ class PropertySearch(BaseModel):
     max_price: Optional[float] = None
     property_type: Optional[str] = None
     amenities: Optional[List[str]] = None
+    amenities_match: str = Field("all", pattern="^(all|any)$")  # Require every amenity, or at least one
     check_in: Optional[datetime] = None
-    check_out: Optional[datetime] = None
\ No newline at end of file
+    check_out: Optional[datetime] = None
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
+    radius_km: Optional[float] = Field(None, gt=0, le=1000)
+    bbox: Optional[str] = None  # min_lng,min_lat,max_lng,max_lat
\ No newline at end of file
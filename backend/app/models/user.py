@@ -54,8 +54,6 @@ class UserUpdate(BaseModel):
 class UserInDB(UserBase):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     hashed_password: str
-    refresh_token: Optional[str] = None
-    refresh_token_expires_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
@@ -76,6 +74,16 @@ class User(UserBase):
         json_encoders = {ObjectId: str}
 
 
+class PublicProfile(BaseModel):
+    # What anyone may see about a landlord on a property page
+    id: str
+    first_name: str
+    last_name: str
+    profile_image: Optional[str] = None
+    is_verified: bool = False
+    member_since: Optional[datetime] = None
+
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
@@ -87,5 +95,14 @@ class Token(BaseModel):
     token_type: str
 
 
+class SessionInfo(BaseModel):
+    id: str
+    user_agent: Optional[str] = None
+    ip_address: Optional[str] = None
+    created_at: datetime
+    last_used_at: datetime
+    expires_at: datetime
+
+
 class TokenData(BaseModel):
     email: Optional[str] = None
\ No newline at end of file
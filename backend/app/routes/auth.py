@@ -1,17 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from app.database.mongodb import get_database
-from app.models.user import UserCreate, UserLogin, User, Token, UserInDB
+from app.models.user import UserCreate, UserLogin, User, Token, UserInDB, SessionInfo
 from pydantic import BaseModel
-from app.auth.jwt import verify_password, get_password_hash, create_access_token, verify_token, create_refresh_token, create_refresh_token_expiry, is_refresh_token_expired
-from app.auth.dependencies import get_current_user
-from app.services.email_service import email_service
+from app.auth.jwt import verify_password_async, get_password_hash_async, verify_and_update_password, access_token_claims, create_access_token, verify_token
+from app.auth.dependencies import get_current_user, get_current_user_profile
+from app.auth.user_cache import user_cache
+from app.auth.token_versions import token_versions
+from app.auth.sessions import session_store
+from app.services.rate_limiter import rate_limiter, client_ip
+from app.services.stats_service import stats_service
+from app.services.notification_outbox import notification_outbox
 from datetime import timedelta
 from app.core.config import settings
 from bson import ObjectId
 from datetime import datetime
-from google.auth.transport import requests
-from google.oauth2 import id_token
+from typing import List
+from app.auth.google_certs import google_cert_cache
 import logging
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -22,9 +27,32 @@ class ChangePasswordRequest(BaseModel):
     new_password: str
 
 
+def _create_access_token_for(user: dict) -> str:
+    """Access token for a user document"""
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+    return create_access_token(data=access_token_claims(user), expires_delta=access_token_expires)
+
+
+async def _issue_tokens(db, user: dict, request: Request) -> dict:
+    """Start a session for this device and return its token pair"""
+    refresh_token, _ = await session_store.create(
+        db,
+        user["_id"],
+        user_agent=request.headers.get("user-agent"),
+        ip_address=client_ip(request)
+    )
+    return {
+        "access_token": _create_access_token_for(user),
+        "refresh_token": refresh_token,
+        "token_type": "bearer"
+    }
+
+
 @router.post("/register", response_model=dict)
-async def register(user: UserCreate, db = Depends(get_database)):
+async def register(user: UserCreate, request: Request, db = Depends(get_database)):
     """Register a new user"""
+    await rate_limiter.check(request, "register", email=user.email)
+    
     # Check if user already exists
     existing_user = await db.users.find_one({"email": user.email})
     if existing_user:
@@ -34,7 +62,7 @@ async def register(user: UserCreate, db = Depends(get_database)):
         )
     
     # Hash password
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     
     # Create user document
     user_data = {
@@ -53,19 +81,24 @@ async def register(user: UserCreate, db = Depends(get_database)):
     
     # Insert user
     result = await db.users.insert_one(user_data)
+    await stats_service.user_changed(db, user.user_type, 1)
     
-    # Send welcome email
-    await email_service.send_welcome_email(
-        user.email, 
-        f"{user.first_name} {user.last_name}"
+    # Queue welcome email (delivered by the notification workers)
+    await notification_outbox.enqueue(
+        db,
+        "welcome_email",
+        {"user_email": user.email, "user_name": f"{user.first_name} {user.last_name}"},
+        dedupe_key=f"welcome_email:{result.inserted_id}"
     )
     
     return {"message": "User registered successfully", "user_id": str(result.inserted_id)}
 
 
 @router.post("/login", response_model=Token)
-async def login(user_credentials: UserLogin, db = Depends(get_database)):
+async def login(user_credentials: UserLogin, request: Request, db = Depends(get_database)):
     """Login user"""
+    await rate_limiter.check(request, "login", email=user_credentials.email)
+    
     # Find user
     user = await db.users.find_one({"email": user_credentials.email})
     if not user:
@@ -76,84 +109,51 @@ async def login(user_credentials: UserLogin, db = Depends(get_database)):
         )
     
     # Verify password
-    if not verify_password(user_credentials.password, user["hashed_password"]):
+    verified, new_hash = await verify_and_update_password(user_credentials.password, user["hashed_password"])
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Create tokens
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
-    )
-    
-    refresh_token = create_refresh_token()
-    refresh_token_expiry = create_refresh_token_expiry()
-    
-    # Store refresh token in database
-    await db.users.update_one(
-        {"_id": user["_id"]},
-        {
-            "$set": {
-                "refresh_token": refresh_token,
-                "refresh_token_expires_at": refresh_token_expiry,
-                "updated_at": datetime.utcnow()
-            }
-        }
-    )
+    # Rehash if the bcrypt cost changed since this password was stored
+    if new_hash:
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
     
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer"
-    }
+    # Create tokens for a new session on this device
+    return await _issue_tokens(db, user, request)
 
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db = Depends(get_database)
 ):
     """OAuth2 compatible token login"""
+    await rate_limiter.check(request, "login", email=form_data.username)
+    
     user = await db.users.find_one({"email": form_data.username})
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    verified, new_hash = (False, None)
+    if user:
+        verified, new_hash = await verify_and_update_password(form_data.password, user["hashed_password"])
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
-    )
-    
-    refresh_token = create_refresh_token()
-    refresh_token_expiry = create_refresh_token_expiry()
-    
-    # Store refresh token in database
-    await db.users.update_one(
-        {"_id": user["_id"]},
-        {
-            "$set": {
-                "refresh_token": refresh_token,
-                "refresh_token_expires_at": refresh_token_expiry,
-                "updated_at": datetime.utcnow()
-            }
-        }
-    )
+    # Rehash if the bcrypt cost changed since this password was stored
+    if new_hash:
+        await db.users.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
     
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer"
-    }
+    return await _issue_tokens(db, user, request)
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_access_token(refresh_token: str, db = Depends(get_database)):
+async def refresh_access_token(refresh_token: str, request: Request, db = Depends(get_database)):
     """Refresh access token using refresh token"""
     if not refresh_token:
         raise HTTPException(
@@ -162,58 +162,77 @@ async def refresh_access_token(refresh_token: str, db = Depends(get_database)):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Find user with this refresh token
-    user = await db.users.find_one({"refresh_token": refresh_token})
-    if not user:
+    # Rotate the session's refresh token (a token can only be used once)
+    rotated = await session_store.rotate(db, refresh_token, ip_address=client_ip(request))
+    if rotated is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid refresh token",
+            detail="Invalid or expired refresh token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    new_refresh_token, session = rotated
     
-    # Check if refresh token is expired
-    if not user.get("refresh_token_expires_at") or is_refresh_token_expired(user["refresh_token_expires_at"]):
-        # Clear expired refresh token
-        await db.users.update_one(
-            {"_id": user["_id"]},
-            {"$unset": {"refresh_token": "", "refresh_token_expires_at": ""}}
-        )
+    user = await db.users.find_one({"_id": session["user_id"]})
+    if not user or not user.get("is_active", True):
+        await session_store.revoke(db, session["user_id"], session["_id"])
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Refresh token has expired",
+            detail="Invalid refresh token",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Generate new tokens
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
-    )
-    
-    new_refresh_token = create_refresh_token()
-    new_refresh_token_expiry = create_refresh_token_expiry()
-    
-    # Update refresh token in database
-    await db.users.update_one(
-        {"_id": user["_id"]},
-        {
-            "$set": {
-                "refresh_token": new_refresh_token,
-                "refresh_token_expires_at": new_refresh_token_expiry,
-                "updated_at": datetime.utcnow()
-            }
-        }
-    )
-    
     return {
-        "access_token": access_token,
+        "access_token": _create_access_token_for(user),
         "refresh_token": new_refresh_token,
         "token_type": "bearer"
     }
 
 
+@router.post("/logout")
+async def logout(refresh_token: str, db = Depends(get_database)):
+    """End the session a refresh token belongs to"""
+    await session_store.revoke_token(db, refresh_token)
+    return {"message": "Logged out successfully"}
+
+
+@router.get("/sessions", response_model=List[SessionInfo])
+async def list_sessions(
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """List the current user's signed-in devices"""
+    sessions = await session_store.list_for_user(db, current_user.id)
+    return [SessionInfo(id=str(session.pop("_id")), **session) for session in sessions]
+
+
+@router.delete("/sessions/{session_id}")
+async def revoke_session(
+    session_id: str,
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """Sign out one of the current user's devices"""
+    if not ObjectId.is_valid(session_id):
+        raise HTTPException(status_code=400, detail="Invalid session ID")
+    
+    if not await session_store.revoke(db, current_user.id, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return {"message": "Session revoked successfully"}
+
+
+@router.delete("/sessions")
+async def revoke_all_sessions(
+    current_user: User = Depends(get_current_user),
+    db = Depends(get_database)
+):
+    """Sign out every device"""
+    revoked = await session_store.revoke_all(db, current_user.id)
+    return {"message": "All sessions revoked successfully", "revoked": revoked}
+
+
 @router.get("/me", response_model=User)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: User = Depends(get_current_user_profile)):
     """Get current user profile"""
     return current_user
 
@@ -241,14 +260,14 @@ async def change_password(
         )
     
     # Verify current password
-    if not verify_password(password_data.current_password, user_doc["hashed_password"]):
+    if not await verify_password_async(password_data.current_password, user_doc["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
         )
     
     # Hash new password
-    new_hashed_password = get_password_hash(password_data.new_password)
+    new_hashed_password = await get_password_hash_async(password_data.new_password)
     
     # Update password in database
     await db.users.update_one(
@@ -260,13 +279,18 @@ async def change_password(
             }
         }
     )
+    await token_versions.bump(db, user_doc["_id"])
+    await session_store.revoke_all(db, user_doc["_id"])
+    user_cache.invalidate(current_user.email)
     
     return {"message": "Password changed successfully"}
 
 
 @router.post("/forgot-password")
-async def forgot_password(email: str, db = Depends(get_database)):
+async def forgot_password(email: str, request: Request, db = Depends(get_database)):
     """Send password reset email"""
+    await rate_limiter.check(request, "forgot_password", email=email)
+    
     user = await db.users.find_one({"email": email})
     if not user:
         # Don't reveal if email exists or not
@@ -278,8 +302,12 @@ async def forgot_password(email: str, db = Depends(get_database)):
         expires_delta=timedelta(minutes=30)
     )
     
-    # Send reset email
-    await email_service.send_password_reset(user["email"], reset_token)
+    # Queue reset email (delivered by the notification workers)
+    await notification_outbox.enqueue(
+        db,
+        "password_reset_email",
+        {"user_email": user["email"], "reset_token": reset_token}
+    )
     
     return {"message": "If email exists, password reset link has been sent"}
 
@@ -303,17 +331,22 @@ async def reset_password(token: str, new_password: str, db = Depends(get_databas
         )
     
     # Update password
-    hashed_password = get_password_hash(new_password)
-    await db.users.update_one(
+    hashed_password = await get_password_hash_async(new_password)
+    user = await db.users.find_one_and_update(
         {"email": email},
-        {"$set": {"hashed_password": hashed_password, "updated_at": datetime.utcnow()}}
+        {"$set": {"hashed_password": hashed_password, "updated_at": datetime.utcnow()}},
+        projection={"_id": 1}
     )
+    if user:
+        await token_versions.bump(db, user["_id"])
+        await session_store.revoke_all(db, user["_id"])
+    user_cache.invalidate(email)
     
     return {"message": "Password reset successfully"}
 
 
 @router.post("/google", response_model=Token)
-async def google_login(token: dict, db = Depends(get_database)):
+async def google_login(token: dict, request: Request, db = Depends(get_database)):
     """Login with Google OAuth token"""
     try:
         # Verify the Google token
@@ -324,13 +357,9 @@ async def google_login(token: dict, db = Depends(get_database)):
                 detail="Google token is required"
             )
         
-        # Verify token with Google
+        # Verify token locally against Google's cached signing certificates
         try:
-            idinfo = id_token.verify_oauth2_token(
-                google_token, 
-                requests.Request(), 
-                settings.google_client_id if hasattr(settings, 'google_client_id') else None
-            )
+            idinfo = await google_cert_cache.verify(google_token, settings.google_client_id)
             
             # Get user info from Google token
             email = idinfo.get('email')
@@ -370,40 +399,19 @@ async def google_login(token: dict, db = Depends(get_database)):
             }
             
             result = await db.users.insert_one(user_data)
+            await stats_service.user_changed(db, "user", 1)
             user = await db.users.find_one({"_id": result.inserted_id})
             
-            # Send welcome email
-            await email_service.send_welcome_email(
-                email, 
-                f"{first_name} {last_name}"
+            # Queue welcome email (delivered by the notification workers)
+            await notification_outbox.enqueue(
+                db,
+                "welcome_email",
+                {"user_email": email, "user_name": f"{first_name} {last_name}"},
+                dedupe_key=f"welcome_email:{result.inserted_id}"
             )
         
-        # Create tokens
-        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-        access_token = create_access_token(
-            data={"sub": user["email"]}, expires_delta=access_token_expires
-        )
-        
-        refresh_token = create_refresh_token()
-        refresh_token_expiry = create_refresh_token_expiry()
-        
-        # Store refresh token in database
-        await db.users.update_one(
-            {"_id": user["_id"]},
-            {
-                "$set": {
-                    "refresh_token": refresh_token,
-                    "refresh_token_expires_at": refresh_token_expiry,
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
-        
-        return {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "token_type": "bearer"
-        }
+        # Create tokens for a new session on this device
+        return await _issue_tokens(db, user, request)
         
     except Exception as e:
         logging.error(f"Google login error: {str(e)}")
@@ -417,27 +425,8 @@ async def google_login(token: dict, db = Depends(get_database)):
 async def get_platform_stats(db = Depends(get_database)):
     """Get platform statistics"""
     try:
-        # Count active properties
-        properties_count = await db.properties.count_documents({"is_active": True})
-        
-        # Count total users
-        users_count = await db.users.count_documents({"is_active": True})
-        
-        # Count landlords
-        landlords_count = await db.users.count_documents({
-            "user_type": "landlord", 
-            "is_active": True
-        })
-        
-        # Count completed bookings (as a proxy for happy tenants)
-        bookings_count = await db.bookings.count_documents({"status": "approved"})
-        
-        return {
-            "available_properties": properties_count,
-            "total_users": users_count,
-            "happy_tenants": bookings_count,
-            "trusted_landlords": landlords_count
-        }
+        # Counters are maintained on write and recounted periodically
+        return await stats_service.get(db)
     except Exception as e:
         logging.error(f"Stats error: {str(e)}")
         # Return default stats if database query fails
@@ -446,4 +435,4 @@ async def get_platform_stats(db = Depends(get_database)):
             "total_users": 0,
             "happy_tenants": 0,
             "trusted_landlords": 0
-        }
\ No newline at end of file
+        }
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from app.database.mongodb import get_database
+from app.database.loaders import Loaders, get_loaders
 from app.models.booking import Booking, BookingCreate, BookingUpdate, BookingResponse
 from app.models.user import User
-from app.auth.dependencies import get_current_active_user, get_current_landlord
-from app.services.email_service import email_service
-from app.services.sms_service import sms_service
+from app.auth.dependencies import get_current_active_user, get_current_active_user_profile, get_current_landlord
+from app.services.notification_outbox import notification_outbox
+from app.services.availability_service import availability_index, naive_utc
+from app.services.bundle_service import bundle_cache
+from app.services.reservation_service import reservation_service, NightsUnavailableError
+from app.services.stats_service import stats_service
+from app.utils.pagination import NEXT_CURSOR_HEADER, apply_cursor, next_cursor, sort_spec
 from bson import ObjectId
+from pymongo import DESCENDING
 from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel
@@ -16,6 +22,7 @@ class PaginatedBookingResponse(BaseModel):
     page: int
     per_page: int
     total_pages: int
+    next_cursor: Optional[str] = None
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
@@ -59,8 +66,9 @@ async def debug_get_all_bookings(
 @router.post("/", response_model=BookingResponse)
 async def create_booking(
     booking_data: BookingCreate,
-    current_user: User = Depends(get_current_active_user),
-    db = Depends(get_database)
+    current_user: User = Depends(get_current_active_user_profile),  # Name and phone for the confirmations
+    db = Depends(get_database),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Create new booking"""
     # Check if property exists
@@ -84,41 +92,35 @@ async def create_booking(
             detail="You already have a pending or confirmed booking for this property"
         )
     
-    # Check if property is available for those dates (from any user)
-    existing_booking = await db.bookings.find_one({
-        "property_id": ObjectId(booking_data.property_id),
-        "status": {"$in": ["pending", "confirmed"]},
-        "$or": [
-            {
-                "check_in": {"$lte": booking_data.check_in},
-                "check_out": {"$gt": booking_data.check_in}
-            },
-            {
-                "check_in": {"$lt": booking_data.check_out},
-                "check_out": {"$gte": booking_data.check_out}
-            },
-            {
-                "check_in": {"$gte": booking_data.check_in},
-                "check_out": {"$lte": booking_data.check_out}
-            }
-        ]
-    })
-    
-    if existing_booking:
+    # Check guest capacity
+    if booking_data.guests > property_data["max_guests"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Property is not available for selected dates"
+            detail="Number of guests exceeds property capacity"
         )
     
-    # Check guest capacity
-    if booking_data.guests > property_data["max_guests"]:
+    if booking_data.check_out <= booking_data.check_in:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Number of guests exceeds property capacity"
+            detail="check_out must be after check_in"
+        )
+    
+    # Atomically claim every night of the stay; the unique (property, night)
+    # index rejects a concurrent booking for any of the same nights
+    booking_id = ObjectId()
+    try:
+        await reservation_service.claim(
+            db, property_data["_id"], booking_id, booking_data.check_in, booking_data.check_out
+        )
+    except NightsUnavailableError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Property is not available for selected dates"
         )
     
     # Create booking document
     booking_doc = booking_data.dict()
+    booking_doc["_id"] = booking_id
     booking_doc["user_id"] = ObjectId(current_user.id)
     booking_doc["property_id"] = ObjectId(booking_data.property_id)
     booking_doc["created_at"] = datetime.utcnow()
@@ -128,14 +130,21 @@ async def create_booking(
     print(f"DEBUG: Booking document user_id: {booking_doc['user_id']}")
     print(f"DEBUG: Property ID: {booking_doc['property_id']}")
     
-    # Insert booking
-    result = await db.bookings.insert_one(booking_doc)
+    # Insert booking, giving the nights back if that fails
+    try:
+        result = await db.bookings.insert_one(booking_doc)
+    except Exception:
+        await reservation_service.release(db, booking_id)
+        raise
     print(f"DEBUG: Booking created with ID: {result.inserted_id}")
+    availability_index.upsert(booking_doc)
+    bundle_cache.invalidate(booking_doc["property_id"])
     
     # Get created booking with property and user details
-    booking_response = await get_booking_with_details(result.inserted_id, db)
+    loaders.properties.prime(property_data)
+    booking_response = (await build_booking_responses([booking_doc], loaders))[0]
     
-    # Send confirmation email
+    # Queue confirmation email (delivered by the notification workers)
     booking_details = {
         "property_title": property_data["title"],
         "check_in": booking_data.check_in.strftime("%Y-%m-%d"),
@@ -144,17 +153,24 @@ async def create_booking(
         "total_price": booking_data.total_price
     }
     
-    await email_service.send_booking_confirmation(
-        current_user.email,
-        f"{current_user.first_name} {current_user.last_name}",
-        booking_details
+    await notification_outbox.enqueue(
+        db,
+        "booking_confirmation_email",
+        {
+            "user_email": current_user.email,
+            "user_name": f"{current_user.first_name} {current_user.last_name}",
+            "booking_details": booking_details
+        },
+        dedupe_key=f"booking_confirmation_email:{booking_id}"
     )
     
     # Send SMS if phone number available
     if current_user.phone:
-        await sms_service.send_booking_confirmation_sms(
-            current_user.phone,
-            booking_details
+        await notification_outbox.enqueue(
+            db,
+            "booking_confirmation_sms",
+            {"phone_number": current_user.phone, "booking_details": booking_details},
+            dedupe_key=f"booking_confirmation_sms:{booking_id}"
         )
     
     return booking_response
@@ -162,11 +178,14 @@ async def create_booking(
 
 @router.get("/", response_model=List[BookingResponse])
 async def get_user_bookings(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     status_filter: Optional[str] = Query(None),
     current_user: User = Depends(get_current_active_user),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Get user's bookings"""
     print(f"DEBUG: Getting bookings for user {current_user.id} ({current_user.email})")
@@ -179,24 +198,28 @@ async def get_user_bookings(
         filter_query["status"] = status_filter
         print(f"DEBUG: Status filter applied: {status_filter}")
     
-    # Get bookings
-    bookings = await db.bookings.find(filter_query).skip(skip).limit(limit).to_list(None)
+    # Get bookings (newest first); a cursor seeks past the previous page instead of skipping
+    if cursor:
+        query = db.bookings.find(apply_cursor(filter_query, "created_at", DESCENDING, cursor))
+    else:
+        query = db.bookings.find(filter_query).skip(skip)
+    bookings = await query.sort(sort_spec("created_at", DESCENDING)).limit(limit).to_list(None)
     print(f"DEBUG: Found {len(bookings)} bookings for user")
     
-    # Get bookings with details
-    booking_responses = []
-    for booking in bookings:
-        booking_response = await get_booking_with_details(booking["_id"], db)
-        booking_responses.append(booking_response)
+    page_cursor = next_cursor(bookings, "created_at", limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
     
-    return booking_responses
+    # Get bookings with details (constant number of queries per page)
+    return await build_booking_responses(bookings, loaders)
 
 
 @router.get("/{booking_id}", response_model=BookingResponse)
 async def get_booking(
     booking_id: str,
     current_user: User = Depends(get_current_active_user),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Get single booking by ID"""
     try:
@@ -217,17 +240,14 @@ async def get_booking(
         
         # If landlord, check if they own the property
         if current_user.user_type == "landlord":
-            property_data = await db.properties.find_one({
-                "_id": booking_data["property_id"],
-                "landlord_id": ObjectId(current_user.id)
-            })
-            if not property_data:
+            property_data = await loaders.properties.load(booking_data["property_id"])
+            if not property_data or property_data.get("landlord_id") != ObjectId(current_user.id):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Not authorized to view this booking"
                 )
         
-        return await get_booking_with_details(ObjectId(booking_id), db)
+        return (await build_booking_responses([booking_data], loaders))[0]
         
     except Exception as e:
         raise HTTPException(
@@ -241,7 +261,8 @@ async def update_booking(
     booking_id: str,
     booking_update: BookingUpdate,
     current_user: User = Depends(get_current_active_user),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Update booking (user can update their own bookings)"""
     # Check if booking exists and belongs to user
@@ -266,14 +287,43 @@ async def update_booking(
     # Prepare update data
     update_data = {k: v for k, v in booking_update.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
+    updated_booking = {**booking_data, **update_data}
+    
+    # Keep the night claims in step with the new status and dates
+    if updated_booking["status"] not in ["pending", "confirmed"]:
+        await reservation_service.release(db, booking_data["_id"])
+    elif "check_in" in update_data or "check_out" in update_data:
+        if naive_utc(updated_booking["check_out"]) <= naive_utc(updated_booking["check_in"]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="check_out must be after check_in"
+            )
+        try:
+            await reservation_service.reclaim(
+                db,
+                booking_data["property_id"],
+                booking_data["_id"],
+                booking_data["check_in"],
+                booking_data["check_out"],
+                updated_booking["check_in"],
+                updated_booking["check_out"]
+            )
+        except NightsUnavailableError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Property is not available for selected dates"
+            )
     
     # Update booking
     await db.bookings.update_one(
         {"_id": ObjectId(booking_id)},
         {"$set": update_data}
     )
+    await stats_service.booking_status_changed(db, booking_data["status"], updated_booking["status"])
+    availability_index.upsert(updated_booking)
+    bundle_cache.invalidate(booking_data["property_id"])
     
-    return await get_booking_with_details(ObjectId(booking_id), db)
+    return await get_booking_with_details(ObjectId(booking_id), db, loaders)
 
 
 @router.delete("/{booking_id}")
@@ -307,6 +357,10 @@ async def cancel_booking(
         {"_id": ObjectId(booking_id)},
         {"$set": {"status": "cancelled", "updated_at": datetime.utcnow()}}
     )
+    await stats_service.booking_status_changed(db, booking_data["status"], "cancelled")
+    await reservation_service.release(db, booking_data["_id"])
+    availability_index.remove(booking_id)
+    bundle_cache.invalidate(booking_data["property_id"])
     
     return {"message": "Booking cancelled successfully"}
 
@@ -315,9 +369,11 @@ async def cancel_booking(
 async def get_landlord_booking_requests(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     status_filter: Optional[str] = Query(None),
     current_user: User = Depends(get_current_landlord),
-    db = Depends(get_database)
+    db = Depends(get_database),
+    loaders: Loaders = Depends(get_loaders)
 ):
     """Get booking requests for landlord's properties with pagination"""
     print(f"DEBUG: Getting booking requests for landlord {current_user.id} ({current_user.email})")
@@ -338,75 +394,23 @@ async def get_landlord_booking_requests(
         
     print(f"DEBUG: Filter query: {filter_query}")
     
-    # Get bookings sorted by creation date (newest first)
-    bookings = await db.bookings.find(filter_query).sort("created_at", -1).skip(skip).limit(limit).to_list(None)
+    # Get bookings sorted by creation date (newest first); a cursor seeks past
+    # the previous page instead of skipping
+    if cursor:
+        query = db.bookings.find(apply_cursor(filter_query, "created_at", DESCENDING, cursor))
+    else:
+        query = db.bookings.find(filter_query).skip(skip)
+    bookings = await query.sort(sort_spec("created_at", DESCENDING)).limit(limit).to_list(None)
     print(f"DEBUG: Found {len(bookings)} bookings for landlord after pagination")
     
     # Debug each booking
     for i, booking in enumerate(bookings):
         print(f"DEBUG: Booking {i+1}: ID={booking['_id']}, user_id={booking['user_id']}, property_id={booking['property_id']}, status={booking['status']}")
     
-    # Optimize: Get all related data in bulk instead of individual queries
-    user_ids = list(set([booking["user_id"] for booking in bookings]))
-    property_ids = list(set([booking["property_id"] for booking in bookings]))
-    
-    print(f"DEBUG: Fetching bulk data for {len(user_ids)} users and {len(property_ids)} properties")
-    
-    # Fetch properties first to get landlord IDs
-    properties_cursor = db.properties.find({"_id": {"$in": property_ids}})
-    properties_list = await properties_cursor.to_list(None)
-    
-    # Add landlord IDs to user_ids for bulk fetch
-    landlord_ids = [prop["landlord_id"] for prop in properties_list if prop.get("landlord_id")]
-    all_user_ids = list(set(user_ids + landlord_ids))
-    
-    print(f"DEBUG: Total user IDs to fetch: {len(all_user_ids)} (including {len(landlord_ids)} landlords)")
-    
-    # Fetch all users (tenants + landlords) in bulk
-    users_cursor = db.users.find({"_id": {"$in": all_user_ids}})
-    users_list = await users_cursor.to_list(None)
-    
-    # Create lookup dictionaries for fast access
-    users_dict = {user["_id"]: user for user in users_list}
-    properties_dict = {prop["_id"]: prop for prop in properties_list}
-    
-    print(f"DEBUG: Loaded {len(users_dict)} users and {len(properties_dict)} properties")
-    
-    # Build booking responses efficiently
-    booking_responses = []
-    for booking in bookings:
-        user_data = users_dict.get(booking["user_id"])
-        property_data = properties_dict.get(booking["property_id"])
-        
-        # Get landlord data if needed
-        landlord_data = None
-        if property_data and property_data.get("landlord_id"):
-            landlord_data = users_dict.get(property_data["landlord_id"])
-        
-        # Create response efficiently without additional DB calls
-        booking_response = BookingResponse(
-            id=str(booking["_id"]),
-            property_id=str(booking["property_id"]),
-            user_id=str(booking["user_id"]),
-            check_in=booking["check_in"],
-            check_out=booking["check_out"],
-            guests=booking["guests"],
-            total_price=booking["total_price"],
-            special_requests=booking.get("special_requests"),
-            status=booking["status"],
-            created_at=booking["created_at"],
-            updated_at=booking["updated_at"],
-            property_title=property_data["title"] if property_data else None,
-            property_location=property_data["location"]["address"] if property_data and property_data.get("location") else None,
-            user_name=f"{user_data['first_name']} {user_data['last_name']}" if user_data else None,
-            user_email=user_data["email"] if user_data else None,
-            user_phone=user_data.get("phone") if user_data else None,
-            landlord_name=f"{landlord_data['first_name']} {landlord_data['last_name']}" if landlord_data else None,
-            landlord_email=landlord_data["email"] if landlord_data else None
-        )
-        
-        booking_responses.append(booking_response)
-        print(f"DEBUG: Added booking response: {booking_response.id} - {booking_response.user_name}")
+    # Landlord's properties are already loaded; tenants are fetched in one batch
+    for prop in landlord_properties:
+        loaders.properties.prime(prop)
+    booking_responses = await build_booking_responses(bookings, loaders)
     
     # Get total count for pagination
     total_count = await db.bookings.count_documents(filter_query)
@@ -422,7 +426,8 @@ async def get_landlord_booking_requests(
         total=total_count,
         page=current_page,
         per_page=limit,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=next_cursor(bookings, "created_at", limit)
     )
 
 
@@ -482,6 +487,9 @@ async def approve_booking(
         {"_id": ObjectId(booking_id)},
         {"$set": update_data}
     )
+    await stats_service.booking_status_changed(db, booking_data["status"], "confirmed")
+    availability_index.upsert({**booking_data, **update_data})
+    bundle_cache.invalidate(booking_data["property_id"])
     
     return {"message": "Booking approved successfully"}
 
@@ -539,28 +547,17 @@ async def reject_booking(
         {"_id": ObjectId(booking_id)},
         {"$set": update_data}
     )
+    await stats_service.booking_status_changed(db, booking_data["status"], "cancelled")
+    await reservation_service.release(db, booking_data["_id"])
+    availability_index.remove(booking_id)
+    bundle_cache.invalidate(booking_data["property_id"])
     
     return {"message": "Booking rejected successfully"}
 
 
-async def get_booking_with_details(booking_id: ObjectId, db) -> BookingResponse:
-    """Get booking with property and user details"""
-    # Get booking
-    booking = await db.bookings.find_one({"_id": booking_id})
-    
-    # Get property details
-    property_data = await db.properties.find_one({"_id": booking["property_id"]})
-    
-    # Get user details
-    user_data = await db.users.find_one({"_id": booking["user_id"]})
-    
-    # Get landlord details if property exists
-    landlord_data = None
-    if property_data and property_data.get("landlord_id"):
-        landlord_data = await db.users.find_one({"_id": property_data["landlord_id"]})
-    
-    # Create response
-    booking_response = BookingResponse(
+def _booking_response(booking: dict, property_data: Optional[dict], user_data: Optional[dict], landlord_data: Optional[dict]) -> BookingResponse:
+    """Build a BookingResponse from a booking and its related documents"""
+    return BookingResponse(
         id=str(booking["_id"]),
         property_id=str(booking["property_id"]),
         user_id=str(booking["user_id"]),
@@ -573,12 +570,39 @@ async def get_booking_with_details(booking_id: ObjectId, db) -> BookingResponse:
         created_at=booking["created_at"],
         updated_at=booking["updated_at"],
         property_title=property_data["title"] if property_data else None,
-        property_location=property_data["location"]["address"] if property_data else None,
+        property_location=property_data["location"]["address"] if property_data and property_data.get("location") else None,
         user_name=f"{user_data['first_name']} {user_data['last_name']}" if user_data else None,
         user_email=user_data["email"] if user_data else None,
         user_phone=user_data.get("phone") if user_data else None,
         landlord_name=f"{landlord_data['first_name']} {landlord_data['last_name']}" if landlord_data else None,
         landlord_email=landlord_data["email"] if landlord_data else None
     )
+
+
+async def build_booking_responses(bookings: List[dict], loaders: Loaders) -> List[BookingResponse]:
+    """Attach property, tenant and landlord details to a page of bookings.
+
+    Properties are resolved in one batch, then tenants and landlords together
+    in a second, so any page size costs at most two queries.
+    """
+    properties = await loaders.properties.load_many(booking["property_id"] for booking in bookings)
+    
+    user_ids = [booking["user_id"] for booking in bookings]
+    landlord_ids = [prop["landlord_id"] for prop in properties if prop and prop.get("landlord_id")]
+    await loaders.users.load_many(set(user_ids + landlord_ids))
+    
+    booking_responses = []
+    for booking, property_data in zip(bookings, properties):
+        user_data = await loaders.users.load(booking["user_id"])
+        landlord_data = None
+        if property_data and property_data.get("landlord_id"):
+            landlord_data = await loaders.users.load(property_data["landlord_id"])
+        booking_responses.append(_booking_response(booking, property_data, user_data, landlord_data))
     
-    return booking_response
\ No newline at end of file
+    return booking_responses
+
+
+async def get_booking_with_details(booking_id: ObjectId, db, loaders: Loaders) -> BookingResponse:
+    """Get booking with property and user details"""
+    booking = await db.bookings.find_one({"_id": booking_id})
+    return (await build_booking_responses([booking], loaders))[0]
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Request
+from app.database.mongodb import get_database
+from app.core.config import settings
+from app.services.home_service import home_snapshot
+from app.utils.etag import etag_matches, etag_response
+
+router = APIRouter(tags=["Home"])
+
+
+@router.get("/home")
+async def get_home(request: Request, db = Depends(get_database)):
+    """Featured properties, featured reviews and platform stats for the landing page"""
+    body, etag = await home_snapshot.get(db)
+    if etag_matches(request, etag):
+        home_snapshot.not_modified += 1
+    return etag_response(request, body, etag, max_age=settings.home_cache_max_age_seconds)
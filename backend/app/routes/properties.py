@@ -1,43 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Query
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Query, Request, Response
 from app.database.mongodb import get_database
-from app.models.property import Property, PropertyCreate, PropertyUpdate, PropertySearch
+from app.models.property import Property, PropertyBundle, PropertyCard, PropertyCreate, PropertyUpdate, PropertySearch, PropertySearchPage, LocationSuggestion
 from app.models.user import User
 from app.auth.dependencies import get_current_active_user, get_current_landlord, get_optional_current_user
 from app.services.cloudinary_service import cloudinary_service
+from app.services.availability_service import availability_index, naive_utc
+from app.services.stats_service import stats_service
+from app.services.rating_service import empty_rating_fields
+from app.services.home_service import home_snapshot
+from app.services.location_index import location_index
+from app.services.facet_service import facet_cache, facet_stages, shape_facets
+from app.services.catalog_engine import catalog_engine
+from app.services.bundle_service import bundle_cache
+from app.core.config import settings
+from app.utils.pagination import NEXT_CURSOR_HEADER, apply_cursor, decode_cursor, encode_cursor, next_cursor, sort_spec
+from app.utils.geo import bbox_polygon, parse_bbox, with_geo_point
+from app.utils.text import location_filter, normalize_key, with_location_keys
+from app.utils.amenities import amenities_mask, mask_for
+from app.utils.cards import CARD_PROJECTION, CARD_STAGE, card_response, to_card
+from app.utils.etag import etag_matches, etag_response
 from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Union
 import tempfile
 import os
 
 router = APIRouter(prefix="/properties", tags=["Properties"])
 
 
-@router.get("/", response_model=List[Property])
+@router.get("/", response_model=Union[List[Property], List[PropertyCard]])
 async def get_properties(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, min_length=1, max_length=200),
     location: Optional[str] = Query(None),
     near_park: Optional[str] = Query(None),
     property_type: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
     max_guests: Optional[int] = Query(None, ge=1),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    sort: Optional[str] = Query(None, pattern="^rating$"),
+    view: str = Query("full", pattern="^(full|card)$"),
     db = Depends(get_database),
     current_user: Optional[User] = Depends(get_optional_current_user)
 ):
-    """Get properties with filtering"""
+    """Get properties with filtering (q for free-text search by relevance, sort=rating for best rated first, view=card for slim listing rows)"""
     # Build filter query
     filter_query = {"is_active": True}
     
+    # Exact matches on the normalized keys offered by /properties/autocomplete
     if location:
-        filter_query["$or"] = [
-            {"location.address": {"$regex": location, "$options": "i"}},
-            {"location.city": {"$regex": location, "$options": "i"}}
-        ]
+        filter_query.update(location_filter(location))
     
     if near_park:
-        filter_query["location.near_park"] = {"$regex": near_park, "$options": "i"}
+        filter_query["location.near_park_key"] = normalize_key(near_park)
     
     if property_type:
         filter_query["property_type"] = property_type
@@ -54,8 +74,35 @@ async def get_properties(
     if max_guests:
         filter_query["max_guests"] = {"$gte": max_guests}
     
-    # Get properties
-    properties = await db.properties.find(filter_query).skip(skip).limit(limit).to_list(None)
+    if min_rating is not None:
+        filter_query["rating_avg"] = {"$gte": min_rating}
+    
+    sort_field, direction = ("rating_avg", DESCENDING) if sort == "rating" else ("_id", ASCENDING)
+    projection = CARD_PROJECTION if view == "card" else None
+    
+    # Served from the in-memory columnar catalog when enabled (not for text search)
+    engine_page = None if q else catalog_engine.search(filter_query, sort_field, direction, skip, limit, cursor)
+    if engine_page is not None:
+        properties, page_cursor = engine_page
+    elif q and sort != "rating":
+        properties, page_cursor, _ = await _text_search(db, filter_query, q, skip, limit, cursor, project=CARD_STAGE if view == "card" else None)
+    else:
+        if q:
+            filter_query["$text"] = {"$search": q}
+        
+        # Get properties - a cursor seeks past the previous page instead of skipping
+        if cursor:
+            query = db.properties.find(apply_cursor(filter_query, sort_field, direction, cursor), projection)
+        else:
+            query = db.properties.find(filter_query, projection).skip(skip)
+        properties = await query.sort(sort_spec(sort_field, direction)).limit(limit).to_list(None)
+        page_cursor = next_cursor(properties, sort_field, limit)
+    
+    if view == "card":
+        return card_response([to_card(prop) for prop in properties], page_cursor)
+    
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
     
     # Convert ObjectIds to strings
     converted_properties = []
@@ -70,27 +117,28 @@ async def get_properties(
     return converted_properties
 
 
-@router.get("/search", response_model=List[Property])
+@router.get("/search", response_model=Union[List[Property], List[PropertyCard], PropertySearchPage])
 async def search_properties(
+    response: Response,
     search_params: PropertySearch = Depends(),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    facets: bool = Query(False),
+    view: str = Query("full", pattern="^(full|card)$"),
     db = Depends(get_database)
 ):
-    """Advanced property search"""
+    """Advanced property search (facets=true wraps the page with filter counts, view=card for slim listing rows)"""
     filter_query = {"is_active": True}
     
     # Build search query
     search_dict = search_params.dict(exclude_none=True)
     
     if "location" in search_dict:
-        filter_query["$or"] = [
-            {"location.address": {"$regex": search_dict["location"], "$options": "i"}},
-            {"location.city": {"$regex": search_dict["location"], "$options": "i"}}
-        ]
+        filter_query.update(location_filter(search_dict["location"]))
     
     if "near_park" in search_dict:
-        filter_query["location.near_park"] = {"$regex": search_dict["near_park"], "$options": "i"}
+        filter_query["location.near_park_key"] = normalize_key(search_dict["near_park"])
     
     if "property_type" in search_dict:
         filter_query["property_type"] = search_dict["property_type"]
@@ -108,14 +156,97 @@ async def search_properties(
         else:
             filter_query["price_per_night"] = {"$lte": search_dict["max_price"]}
     
-    # Amenities filter
-    if "amenities" in search_dict:
-        for amenity in search_dict["amenities"]:
-            filter_query[f"amenities.{amenity}"] = True
+    # Amenities filter: one bitwise predicate on amenities_mask
+    if search_dict.get("amenities"):
+        operator = "$bitsAnySet" if search_dict["amenities_match"] == "any" else "$bitsAllSet"
+        filter_query["amenities_mask"] = {operator: mask_for(search_dict["amenities"])}
+    
+    # Availability: exclude properties with an overlapping pending/confirmed booking
+    if "check_in" in search_dict or "check_out" in search_dict:
+        if "check_in" not in search_dict or "check_out" not in search_dict:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="check_in and check_out must be provided together"
+            )
+        # Compare as naive UTC, like the stored bookings (mixed offsets would otherwise raise)
+        check_in, check_out = naive_utc(search_dict["check_in"]), naive_utc(search_dict["check_out"])
+        if check_in >= check_out:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="check_out must be after check_in"
+            )
+        booked_ids = availability_index.booked_property_ids(check_in, check_out)
+        if booked_ids:
+            filter_query["_id"] = {"$nin": [ObjectId(pid) for pid in booked_ids]}
+    
+    is_geo = any(key in search_dict for key in ("lat", "lng", "radius_km", "bbox"))
+    geo = _geo_params(search_dict) if is_geo else None
+    
+    # Facet counts: the unfiltered catalog comes from cache, anything narrower is
+    # counted in the same $facet aggregation as the result page
+    facet_counts = None
+    stages = None
+    if facets:
+        if filter_query == {"is_active": True} and not is_geo and "q" not in search_dict:
+            facet_counts = await facet_cache.get(db)
+        else:
+            stages = facet_stages()
+    
+    if is_geo and "q" in search_dict:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="q cannot be combined with geo search"
+        )
+    
+    # view=card only reads the fields a listing card shows
+    projection = CARD_PROJECTION if view == "card" else None
+    project = CARD_STAGE if view == "card" else None
+    
+    # Served from the in-memory columnar catalog when enabled (not for text search or facets)
+    engine_page = None
+    if "q" not in search_dict and not stages:
+        engine_page = catalog_engine.search(filter_query, skip=skip, limit=limit, cursor=cursor, geo=geo)
+    
+    if engine_page is not None:
+        properties, page_cursor = engine_page
+        raw_facets = None
+    # Geo search: radius around a point and/or bounding box, nearest first
+    elif is_geo:
+        properties, page_cursor, raw_facets = await _geo_search(db, filter_query, geo, skip, limit, cursor, stages, project)
+    elif "q" in search_dict:
+        properties, page_cursor, raw_facets = await _text_search(db, filter_query, search_dict["q"], skip, limit, cursor, stages, project)
+    elif stages:
+        page = []
+        if cursor:
+            page.append({"$match": apply_cursor({}, "_id", ASCENDING, cursor)})
+        page.append({"$sort": {"_id": 1}})
+        if skip and not cursor:
+            page.append({"$skip": skip})
+        page.append({"$limit": limit})
+        if project:
+            page.append(project)
+        properties, raw_facets = await _aggregate_page(db, [{"$match": filter_query}], page, stages)
+        page_cursor = next_cursor(properties, "_id", limit)
+    else:
+        if cursor:
+            query = db.properties.find(apply_cursor(filter_query, "_id", ASCENDING, cursor), projection)
+        else:
+            query = db.properties.find(filter_query, projection).skip(skip)
+        properties = await query.sort(sort_spec("_id", ASCENDING)).limit(limit).to_list(None)
+        page_cursor = next_cursor(properties, "_id", limit)
+        raw_facets = None
+    
+    if raw_facets is not None:
+        facet_counts = shape_facets(raw_facets)
     
-    # TODO: Add availability check for check_in/check_out dates
+    if view == "card":
+        cards = [to_card(prop) for prop in properties]
+        if facets:
+            return card_response({"results": cards, "facets": facet_counts, "next_cursor": page_cursor}, page_cursor)
+        return card_response(cards, page_cursor)
     
-    properties = await db.properties.find(filter_query).skip(skip).limit(limit).to_list(None)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
     
     # Convert ObjectIds to strings
     converted_properties = []
@@ -125,11 +256,133 @@ async def search_properties(
             del prop["_id"]
         if "landlord_id" in prop:
             prop["landlord_id"] = str(prop["landlord_id"])
+        if "distance" in prop:
+            prop["distance_km"] = round(prop.pop("distance") / 1000, 3)
         converted_properties.append(Property(**prop))
     
+    if facets:
+        return PropertySearchPage(results=converted_properties, facets=facet_counts, next_cursor=page_cursor)
     return converted_properties
 
 
+async def _aggregate_page(db, base: list, page: list, stages: Optional[dict]):
+    """Run base + page stages, returning (documents, raw facet counts over base or None)"""
+    if not stages:
+        return await db.properties.aggregate(base + page).to_list(None), None
+    rows = await db.properties.aggregate(base + [{"$facet": {"results": page, **stages}}]).to_list(None)
+    raw_facets = rows[0]
+    return raw_facets.pop("results"), raw_facets
+
+
+async def _text_search(db, filter_query: dict, q: str, skip: int, limit: int, cursor: Optional[str], stages: Optional[dict] = None, project: Optional[dict] = None):
+    """Run a $text search ranked by relevance, returning (documents, next cursor, raw facets)"""
+    base = [
+        {"$match": {**filter_query, "$text": {"$search": q}}},
+        {"$addFields": {"score": {"$meta": "textScore"}}}
+    ]
+    page = []
+    if cursor:
+        # Resume after the last score seen, using _id to break ties
+        last_score, last_id = decode_cursor(cursor)
+        page.append({"$match": {"$or": [
+            {"score": {"$lt": last_score}},
+            {"score": last_score, "_id": {"$gt": last_id}}
+        ]}})
+    page.append({"$sort": {"score": -1, "_id": 1}})
+    if skip and not cursor:
+        page.append({"$skip": skip})
+    page.append({"$limit": limit})
+    if project:
+        page.append(project)
+    
+    properties, raw_facets = await _aggregate_page(db, base, page, stages)
+    
+    page_cursor = None
+    if len(properties) == limit:
+        page_cursor = encode_cursor(properties[-1]["score"], properties[-1]["_id"])
+    return properties, page_cursor, raw_facets
+
+
+def _geo_params(search_dict: dict) -> dict:
+    """Validated search point, optional radius (metres) and optional bounding box"""
+    has_point = "lat" in search_dict and "lng" in search_dict
+    if ("lat" in search_dict) != ("lng" in search_dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="lat and lng must be provided together"
+        )
+    if "radius_km" in search_dict and not has_point:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="radius_km requires lat and lng"
+        )
+    
+    geo = {"lng": search_dict.get("lng"), "lat": search_dict.get("lat"), "radius_m": None, "bbox": None}
+    if "bbox" in search_dict:
+        geo["bbox"] = parse_bbox(search_dict["bbox"])
+        # Without a search point, rank by distance from the centre of the box
+        if not has_point:
+            min_lng, min_lat, max_lng, max_lat = geo["bbox"]
+            geo["lng"] = (min_lng + max_lng) / 2
+            geo["lat"] = (min_lat + max_lat) / 2
+    if "radius_km" in search_dict:
+        geo["radius_m"] = search_dict["radius_km"] * 1000
+    return geo
+
+
+async def _geo_search(db, filter_query: dict, geo: dict, skip: int, limit: int, cursor: Optional[str], stages: Optional[dict] = None, project: Optional[dict] = None):
+    """Run a $geoNear search over location.geo, returning (documents, next cursor, raw facets)"""
+    query = dict(filter_query)
+    if geo["bbox"]:
+        query["location.geo"] = {"$geoWithin": {"$geometry": bbox_polygon(*geo["bbox"])}}
+    
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [geo["lng"], geo["lat"]]},
+        "key": "location.geo",
+        "distanceField": "distance",
+        "spherical": True,
+        "query": query
+    }
+    if geo["radius_m"] is not None:
+        geo_near["maxDistance"] = geo["radius_m"]
+    
+    page = []
+    if cursor:
+        # Resume from the last distance seen, using _id to break ties
+        last_distance, last_id = decode_cursor(cursor)
+        if not stages:
+            # Facets count the whole result set, so only skip ahead without them
+            geo_near["minDistance"] = last_distance
+        page.append({"$match": {"$or": [
+            {"distance": {"$gt": last_distance}},
+            {"distance": last_distance, "_id": {"$gt": last_id}}
+        ]}})
+    page.append({"$sort": {"distance": 1, "_id": 1}})
+    if skip and not cursor:
+        page.append({"$skip": skip})
+    page.append({"$limit": limit})
+    if project:
+        page.append(project)
+    
+    properties, raw_facets = await _aggregate_page(db, [{"$geoNear": geo_near}], page, stages)
+    
+    page_cursor = None
+    if len(properties) == limit:
+        page_cursor = encode_cursor(properties[-1]["distance"], properties[-1]["_id"])
+    return properties, page_cursor, raw_facets
+
+
+@router.get("/autocomplete", response_model=List[LocationSuggestion])
+async def autocomplete_locations(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    type: Optional[str] = Query(None, pattern="^(city|park|address)$")
+):
+    """Typeahead suggestions for cities, parks and addresses with listing counts"""
+    types = (type,) if type else ("city", "park", "address")
+    return [LocationSuggestion(**match) for match in location_index.suggest(q, limit, types)]
+
+
 @router.get("/{property_id}", response_model=Property)
 async def get_property(
     property_id: str,
@@ -161,6 +414,33 @@ async def get_property(
         )
 
 
+@router.get("/{property_id}/bundle", response_model=PropertyBundle)
+async def get_property_bundle(
+    property_id: str,
+    request: Request,
+    reviews_limit: int = Query(5, ge=1, le=20),
+    db = Depends(get_database)
+):
+    """Property page in one request: property, landlord profile, latest reviews and booked dates"""
+    if not ObjectId.is_valid(property_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Property not found"
+        )
+    
+    bundle = await bundle_cache.get(db, property_id, reviews_limit)
+    if bundle is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Property not found"
+        )
+    
+    body, etag = bundle
+    if etag_matches(request, etag):
+        bundle_cache.not_modified += 1
+    return etag_response(request, body, etag, max_age=settings.bundle_cache_max_age_seconds)
+
+
 @router.post("/", response_model=Property)
 async def create_property(
     property_data: PropertyCreate,
@@ -170,12 +450,21 @@ async def create_property(
     """Create new property (landlords only)"""
     # Prepare property document
     property_doc = property_data.dict()
+    with_geo_point(property_doc["location"])
+    with_location_keys(property_doc["location"])
+    property_doc["amenities_mask"] = amenities_mask(property_doc["amenities"])
     property_doc["landlord_id"] = ObjectId(current_user.id)
     property_doc["created_at"] = datetime.utcnow()
     property_doc["updated_at"] = datetime.utcnow()
+    property_doc.update(empty_rating_fields())
     
     # Insert property
     result = await db.properties.insert_one(property_doc)
+    await stats_service.property_changed(db, False, property_doc.get("is_active", True))
+    location_index.upsert(property_doc)
+    catalog_engine.upsert(property_doc)
+    facet_cache.invalidate()
+    home_snapshot.invalidate()
     
     # Get created property
     created_property = await db.properties.find_one({"_id": result.inserted_id})
@@ -211,15 +500,27 @@ async def update_property(
     # Prepare update data
     update_data = {k: v for k, v in property_update.dict().items() if v is not None}
     update_data["updated_at"] = datetime.utcnow()
+    if "location" in update_data:
+        with_geo_point(update_data["location"])
+        with_location_keys(update_data["location"])
+    if "amenities" in update_data:
+        update_data["amenities_mask"] = amenities_mask(update_data["amenities"])
     
     # Update property
     await db.properties.update_one(
         {"_id": ObjectId(property_id)},
         {"$set": update_data}
     )
+    if "is_active" in update_data:
+        await stats_service.property_changed(db, property_data.get("is_active", True), update_data["is_active"])
+    home_snapshot.invalidate()
     
     # Get updated property
     updated_property = await db.properties.find_one({"_id": ObjectId(property_id)})
+    location_index.upsert(updated_property)
+    catalog_engine.upsert(updated_property)
+    facet_cache.invalidate()
+    bundle_cache.invalidate(property_id)
     
     # Convert ObjectId fields to strings for the response model
     updated_property["id"] = str(updated_property["_id"])
@@ -249,9 +550,16 @@ async def delete_property(
         )
     
     # Hard delete - actually remove the property
-    await db.properties.delete_one(
+    result = await db.properties.delete_one(
         {"_id": ObjectId(property_id)}
     )
+    if result.deleted_count:
+        await stats_service.property_changed(db, property_data.get("is_active", True), False)
+    location_index.remove(property_id)
+    catalog_engine.remove(property_id)
+    facet_cache.invalidate()
+    bundle_cache.invalidate(property_id)
+    home_snapshot.invalidate()
     
     return {"message": "Property deleted successfully"}
 
@@ -310,22 +618,30 @@ async def upload_property_images(
                 "$set": {"updated_at": datetime.utcnow()}
             }
         )
+        await catalog_engine.refresh(db, property_id)
+        bundle_cache.invalidate(property_id)
+        home_snapshot.invalidate()
     
     return {"message": f"Uploaded {len(uploaded_urls)} images successfully", "urls": uploaded_urls}
 
 
-@router.get("/landlord/my-properties", response_model=List[Property])
+@router.get("/landlord/my-properties", response_model=Union[List[Property], List[PropertyCard]])
 async def get_landlord_properties(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    view: str = Query("full", pattern="^(full|card)$"),
     current_user: User = Depends(get_current_landlord),
     db = Depends(get_database)
 ):
-    """Get properties owned by current landlord"""
+    """Get properties owned by current landlord (view=card for slim listing rows)"""
     properties = await db.properties.find(
-        {"landlord_id": ObjectId(current_user.id)}
+        {"landlord_id": ObjectId(current_user.id)},
+        CARD_PROJECTION if view == "card" else None
     ).skip(skip).limit(limit).to_list(None)
     
+    if view == "card":
+        return card_response([to_card(prop) for prop in properties])
+    
     # Convert ObjectId fields to strings for response models
     converted_properties = []
     for prop in properties:
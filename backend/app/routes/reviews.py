@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from app.database.mongodb import get_database
 from app.models.review import Review, ReviewCreate, ReviewUpdate
 from app.models.user import User
-from app.auth.dependencies import get_current_active_user, get_optional_current_user
+from app.auth.dependencies import get_current_active_user, get_current_active_user_profile, get_optional_current_user
+from app.services.rating_service import rating_service
+from app.services.home_service import home_snapshot
+from app.services.bundle_service import bundle_cache
+from app.utils.pagination import NEXT_CURSOR_HEADER, apply_cursor, next_cursor, sort_spec
 from bson import ObjectId
+from pymongo import DESCENDING
 from datetime import datetime
 from typing import Optional, List
 
@@ -12,8 +17,10 @@ router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
 @router.get("/", response_model=List[Review])
 async def get_reviews(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
     property_id: Optional[str] = Query(None),
     booking_id: Optional[str] = Query(None),
     stage: Optional[str] = Query(None),
@@ -43,7 +50,16 @@ async def get_reviews(
         else:
             filter_query["property_id"] = property_id
     
-    reviews = await db.reviews.find(filter_query).skip(skip).limit(limit).sort("created_at", -1).to_list(None)
+    # Newest first; a cursor seeks past the previous page instead of skipping
+    if cursor:
+        query = db.reviews.find(apply_cursor(filter_query, "created_at", DESCENDING, cursor))
+    else:
+        query = db.reviews.find(filter_query).skip(skip)
+    reviews = await query.sort(sort_spec("created_at", DESCENDING)).limit(limit).to_list(None)
+    
+    page_cursor = next_cursor(reviews, "created_at", limit)
+    if page_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page_cursor
     
     # Convert ObjectIds to strings
     converted_reviews = []
@@ -83,7 +99,7 @@ async def get_featured_reviews(
 @router.post("/", response_model=Review)
 async def create_review(
     review_data: ReviewCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_profile),  # Name for the review byline
     db = Depends(get_database)
 ):
     """Create a new review"""
@@ -144,6 +160,9 @@ async def create_review(
     
     # Insert review
     result = await db.reviews.insert_one(review_doc)
+    await rating_service.apply(db, None, review_doc)
+    bundle_cache.invalidate(review_doc.get("property_id"))
+    home_snapshot.invalidate()
     
     # Get created review
     created_review = await db.reviews.find_one({"_id": result.inserted_id})
@@ -184,14 +203,20 @@ async def update_review(
     if "comment" in update_data or "rating" in update_data:
         update_data["is_approved"] = False
     
-    # Update review
-    await db.reviews.update_one(
+    # Update review, keeping the property's rating aggregates in step
+    previous = await db.reviews.find_one_and_update(
         {"_id": ObjectId(review_id)},
         {"$set": update_data}
     )
-    
-    # Get updated review
-    updated_review = await db.reviews.find_one({"_id": ObjectId(review_id)})
+    if not previous:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Review not found or not owned by you"
+        )
+    updated_review = {**previous, **update_data}
+    await rating_service.apply(db, previous, updated_review)
+    bundle_cache.invalidate(previous.get("property_id"))
+    home_snapshot.invalidate()
     
     # Convert ObjectId to string
     if "_id" in updated_review:
@@ -221,7 +246,11 @@ async def delete_review(
         )
     
     # Delete review
-    await db.reviews.delete_one({"_id": ObjectId(review_id)})
+    deleted_review = await db.reviews.find_one_and_delete({"_id": ObjectId(review_id)})
+    await rating_service.apply(db, deleted_review, None)
+    if deleted_review:
+        bundle_cache.invalidate(deleted_review.get("property_id"))
+    home_snapshot.invalidate()
     
     return {"message": "Review deleted successfully"}
 
@@ -244,11 +273,15 @@ async def approve_review(
             detail="Review not found"
         )
     
-    # Approve review
-    await db.reviews.update_one(
+    # Approve review - the pre-update document tells whether it was already counted
+    previous = await db.reviews.find_one_and_update(
         {"_id": ObjectId(review_id)},
         {"$set": {"is_approved": True, "updated_at": datetime.utcnow()}}
     )
+    if previous:
+        await rating_service.apply(db, previous, {**previous, "is_approved": True})
+        bundle_cache.invalidate(previous.get("property_id"))
+        home_snapshot.invalidate()
     
     return {"message": "Review approved successfully"}
 
@@ -271,7 +304,7 @@ async def feature_review(
         )
     
     # Feature review (and approve if not already)
-    await db.reviews.update_one(
+    previous = await db.reviews.find_one_and_update(
         {"_id": ObjectId(review_id)},
         {
             "$set": {
@@ -281,5 +314,9 @@ async def feature_review(
             }
         }
     )
+    if previous:
+        await rating_service.apply(db, previous, {**previous, "is_approved": True})
+        bundle_cache.invalidate(previous.get("property_id"))
+        home_snapshot.invalidate()
     
     return {"message": "Review featured successfully"}
\ No newline at end of file
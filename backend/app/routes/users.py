@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Query
 from app.database.mongodb import get_database
 from app.models.user import User, UserUpdate
-from app.auth.dependencies import get_current_active_user
+from app.auth.dependencies import get_current_active_user, get_current_active_user_profile
+from app.auth.token_versions import token_versions
+from app.auth.sessions import session_store
+from app.services.stats_service import stats_service
+from app.auth.user_cache import user_cache
 from app.services.cloudinary_service import cloudinary_service
+from app.utils.cards import CARD_PROJECTION, card_response, to_card
 from bson import ObjectId
 from datetime import datetime
 import tempfile
@@ -12,7 +17,7 @@ router = APIRouter(prefix="/users", tags=["Users"])
 
 
 @router.get("/profile", response_model=User)
-async def get_user_profile(current_user: User = Depends(get_current_active_user)):
+async def get_user_profile(current_user: User = Depends(get_current_active_user_profile)):
     """Get current user profile"""
     return current_user
 
@@ -33,6 +38,7 @@ async def update_user_profile(
         {"_id": ObjectId(current_user.id)},
         {"$set": update_data}
     )
+    user_cache.invalidate(current_user.email)
     
     # Get updated user
     updated_user = await db.users.find_one({"_id": ObjectId(current_user.id)})
@@ -48,7 +54,7 @@ async def update_user_profile(
 @router.post("/upload-avatar")
 async def upload_avatar(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_active_user_profile),
     db = Depends(get_database)
 ):
     """Upload user avatar"""
@@ -86,6 +92,7 @@ async def upload_avatar(
             {"_id": ObjectId(current_user.id)},
             {"$set": {"profile_image": image_url, "updated_at": datetime.utcnow()}}
         )
+        user_cache.invalidate(current_user.email)
         
         return {"message": "Avatar uploaded successfully", "image_url": image_url}
         
@@ -102,10 +109,15 @@ async def delete_user_account(
 ):
     """Delete user account"""
     # Soft delete - just deactivate the account
-    await db.users.update_one(
-        {"_id": ObjectId(current_user.id)},
+    result = await db.users.update_one(
+        {"_id": ObjectId(current_user.id), "is_active": True},
         {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
     )
+    if result.modified_count:
+        await stats_service.user_changed(db, current_user.user_type, -1)
+    await token_versions.bump(db, current_user.id)
+    await session_store.revoke_all(db, current_user.id)
+    user_cache.invalidate(current_user.email)
     
     # TODO: Cancel all active bookings
     # TODO: Deactivate all properties if landlord
@@ -115,10 +127,11 @@ async def delete_user_account(
 
 @router.get("/favourites")
 async def get_user_favourites(
+    view: str = Query("full", pattern="^(full|card)$"),
     current_user: User = Depends(get_current_active_user),
     db = Depends(get_database)
 ):
-    """Get user's favourite properties"""
+    """Get user's favourite properties (view=card for slim listing rows)"""
     # Get user favourites (assuming we store them in user document)
     user_data = await db.users.find_one({"_id": ObjectId(current_user.id)})
     favourite_ids = user_data.get("favourites", [])
@@ -128,9 +141,13 @@ async def get_user_favourites(
     
     # Get favourite properties
     properties = await db.properties.find(
-        {"_id": {"$in": [ObjectId(pid) for pid in favourite_ids]}}
+        {"_id": {"$in": [ObjectId(pid) for pid in favourite_ids]}},
+        CARD_PROJECTION if view == "card" else None
     ).to_list(None)
     
+    if view == "card":
+        return card_response({"favourites": [to_card(prop) for prop in properties]})
+    
     # Convert ObjectId to string for JSON serialization
     for prop in properties:
         if prop.get("_id"):
@@ -162,6 +179,7 @@ async def add_to_favourites(
         {"_id": ObjectId(current_user.id)},
         {"$addToSet": {"favourites": property_id}}
     )
+    user_cache.invalidate(current_user.email)
     
     return {"message": "Property added to favourites"}
 
@@ -178,5 +196,6 @@ async def remove_from_favourites(
         {"_id": ObjectId(current_user.id)},
         {"$pull": {"favourites": property_id}}
     )
+    user_cache.invalidate(current_user.email)
     
     return {"message": "Property removed from favourites"}
\ No newline at end of file
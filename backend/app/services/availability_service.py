@@ -0,0 +1,149 @@
+import asyncio
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+
+# Booking statuses that hold the property's dates
+ACTIVE_BOOKING_STATUSES = ("pending", "confirmed")
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Normalize a datetime to naive UTC, matching what MongoDB returns"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class AvailabilityIndex:
+    """In-memory interval index of pending and confirmed bookings per property.
+
+    Loaded at startup and kept current by the booking routes, so search
+    can exclude booked properties without an overlap query per property.
+    Each worker process holds its own copy and reloads it every
+    availability_reload_seconds, so bookings made on other workers or
+    replicas are excluded within that bound.
+    """
+
+    def __init__(self):
+        # property_id -> sorted list of (check_in, check_out, booking_id)
+        self._intervals: Dict[str, List[Tuple[datetime, datetime, str]]] = {}
+        # booking_id -> property_id, so updates and cancellations can find the interval
+        self._booking_property: Dict[str, str] = {}
+        # Local writes made while a reload is reading, replayed onto the new snapshot
+        self._changes_during_load: Optional[Dict[str, Optional[dict]]] = None
+        self._reload_task: Optional[asyncio.Task] = None
+        self.loaded = False
+        self.loaded_at: Optional[datetime] = None
+
+    async def load(self, db):
+        """Load every active booking that has not checked out yet"""
+        self._changes_during_load = {}
+        try:
+            bookings = await db.bookings.find(
+                {
+                    "status": {"$in": list(ACTIVE_BOOKING_STATUSES)},
+                    "check_out": {"$gt": datetime.utcnow()}
+                },
+                {"property_id": 1, "check_in": 1, "check_out": 1, "status": 1}
+            ).to_list(None)
+            changes = self._changes_during_load
+        finally:
+            self._changes_during_load = None
+
+        # Swap in the new snapshot without yielding, so searches never see a partial load
+        self._intervals = {}
+        self._booking_property = {}
+        for booking in bookings:
+            self.upsert(booking)
+        for booking_id, booking in changes.items():
+            if booking is None:
+                self.remove(booking_id)
+            else:
+                self.upsert(booking)
+        self.loaded = True
+        self.loaded_at = datetime.utcnow()
+        print(f"Loaded availability index: {len(self._booking_property)} active bookings")
+
+    def start(self, db):
+        """Start the periodic reload task"""
+        if self._reload_task is None:
+            self._reload_task = asyncio.create_task(self._reload_loop(db))
+
+    async def stop(self):
+        """Stop the reload task"""
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+
+    async def _reload_loop(self, db):
+        """Reload the index every availability_reload_seconds to pick up other workers' bookings"""
+        while True:
+            await asyncio.sleep(settings.availability_reload_seconds)
+            try:
+                await self.load(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Availability index reload failed: {e}")
+
+    def upsert(self, booking: dict):
+        """Add, move or drop a booking depending on its current status and dates"""
+        booking_id = str(booking["_id"])
+        if self._changes_during_load is not None:
+            self._changes_during_load[booking_id] = booking
+        self._drop(booking_id)
+        if booking.get("status") not in ACTIVE_BOOKING_STATUSES:
+            return
+
+        property_id = str(booking["property_id"])
+        interval = (naive_utc(booking["check_in"]), naive_utc(booking["check_out"]), booking_id)
+        insort(self._intervals.setdefault(property_id, []), interval)
+        self._booking_property[booking_id] = property_id
+
+    def remove(self, booking_id):
+        """Drop a booking from the index (no-op if it is not tracked)"""
+        booking_id = str(booking_id)
+        if self._changes_during_load is not None:
+            self._changes_during_load[booking_id] = None
+        self._drop(booking_id)
+
+    def _drop(self, booking_id: str):
+        """Remove a booking's interval without recording it as a local change"""
+        property_id = self._booking_property.pop(booking_id, None)
+        if property_id is None:
+            return
+
+        intervals = self._intervals[property_id]
+        self._intervals[property_id] = [i for i in intervals if i[2] != booking_id]
+        if not self._intervals[property_id]:
+            del self._intervals[property_id]
+
+    def _overlaps(self, intervals: List[Tuple[datetime, datetime, str]], check_in: datetime, check_out: datetime) -> bool:
+        """Whether any interval overlaps [check_in, check_out)"""
+        # Only intervals starting before check_out can overlap
+        end = bisect_left(intervals, (check_out,))
+        return any(interval_out > check_in for _, interval_out, _ in intervals[:end])
+
+    def is_available(self, property_id: str, check_in: datetime, check_out: datetime) -> bool:
+        """Whether a property has no active booking overlapping the given dates"""
+        intervals = self._intervals.get(str(property_id))
+        if not intervals:
+            return True
+        return not self._overlaps(intervals, naive_utc(check_in), naive_utc(check_out))
+
+    def booked_property_ids(self, check_in: datetime, check_out: datetime) -> Set[str]:
+        """IDs of every property with an active booking overlapping the given dates"""
+        check_in, check_out = naive_utc(check_in), naive_utc(check_out)
+        return {
+            property_id
+            for property_id, intervals in self._intervals.items()
+            if self._overlaps(intervals, check_in, check_out)
+        }
+
+
+availability_index = AvailabilityIndex()
@@ -0,0 +1,161 @@
+import json
+import time
+from bson import ObjectId
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from fastapi.encoders import jsonable_encoder
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.models.property import Property, PropertyBundle
+from app.services.availability_service import ACTIVE_BOOKING_STATUSES
+from app.utils.etag import compute_etag
+
+# How far ahead booked ranges are returned
+AVAILABILITY_DAYS = 90
+PUBLIC_PROFILE_FIELDS = ("first_name", "last_name", "profile_image", "is_verified", "created_at")
+
+
+def bundle_pipeline(property_id: ObjectId, reviews_limit: int, now: datetime) -> list:
+    """One aggregation joining a property to its landlord, latest reviews and upcoming bookings"""
+    return [
+        {"$match": {"_id": property_id}},
+        {"$lookup": {
+            "from": "users",
+            "let": {"landlord_id": "$landlord_id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$landlord_id"]}}},
+                {"$project": {field: 1 for field in PUBLIC_PROFILE_FIELDS}}
+            ],
+            "as": "landlord"
+        }},
+        # reviews.property_id is stored as a string
+        {"$lookup": {
+            "from": "reviews",
+            "let": {"property_id": {"$toString": "$_id"}},
+            "pipeline": [
+                {"$match": {"is_approved": True, "$expr": {"$eq": ["$property_id", "$$property_id"]}}},
+                {"$sort": {"created_at": -1, "_id": -1}},
+                {"$limit": reviews_limit}
+            ],
+            "as": "reviews"
+        }},
+        {"$lookup": {
+            "from": "bookings",
+            "let": {"property_id": "$_id"},
+            "pipeline": [
+                {"$match": {
+                    "status": {"$in": list(ACTIVE_BOOKING_STATUSES)},
+                    "check_in": {"$lt": now + timedelta(days=AVAILABILITY_DAYS)},
+                    "check_out": {"$gt": now},
+                    "$expr": {"$eq": ["$property_id", "$$property_id"]}
+                }},
+                {"$sort": {"check_in": 1}},
+                {"$project": {"_id": 0, "check_in": 1, "check_out": 1}}
+            ],
+            "as": "booked"
+        }}
+    ]
+
+
+def _merge_ranges(bookings: List[dict]) -> List[dict]:
+    """Collapse overlapping or touching stays (sorted by check_in) into blocked ranges"""
+    merged: List[dict] = []
+    for booking in bookings:
+        if merged and booking["check_in"] <= merged[-1]["check_out"]:
+            merged[-1]["check_out"] = max(merged[-1]["check_out"], booking["check_out"])
+        else:
+            merged.append({"check_in": booking["check_in"], "check_out": booking["check_out"]})
+    return merged
+
+
+def _shape(row: dict) -> PropertyBundle:
+    """Turn the aggregation row into a PropertyBundle"""
+    landlords = row.pop("landlord")
+    reviews = row.pop("reviews")
+    booked = row.pop("booked")
+
+    row["id"] = str(row.pop("_id"))
+    row["landlord_id"] = str(row["landlord_id"])
+
+    landlord = None
+    if landlords:
+        profile = landlords[0]
+        landlord = {
+            "id": str(profile["_id"]),
+            "first_name": profile.get("first_name", ""),
+            "last_name": profile.get("last_name", ""),
+            "profile_image": profile.get("profile_image"),
+            "is_verified": profile.get("is_verified", False),
+            "member_since": profile.get("created_at")
+        }
+    for review in reviews:
+        review["id"] = str(review.pop("_id"))
+
+    return PropertyBundle(
+        property=Property(**row),
+        landlord=landlord,
+        reviews=reviews,
+        booked=_merge_ranges(booked)
+    )
+
+
+class BundleCache:
+    """Short-TTL cache of serialised property page bundles.
+
+    GET /properties/{id}/bundle builds everything a property page needs in
+    one aggregation, then keeps the JSON body and its ETag for
+    bundle_cache_ttl_seconds, keyed by property and review count. Property,
+    review and booking writes call invalidate() for the property they
+    touch. Each worker process holds its own copy, so the TTL bounds
+    staleness across workers.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Dict[int, tuple]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def get(self, db, property_id: str, reviews_limit: int) -> Optional[Tuple[bytes, str]]:
+        """Bundle body and ETag for a property, or None if it does not exist"""
+        entry = self._entries.get(property_id, {}).get(reviews_limit)
+        if entry is not None and entry[2] > time.monotonic():
+            self._entries.move_to_end(property_id)
+            self.hits += 1
+            return entry[0], entry[1]
+
+        self.misses += 1
+        rows = await db.properties.aggregate(
+            bundle_pipeline(ObjectId(property_id), reviews_limit, datetime.utcnow())
+        ).to_list(None)
+        if not rows:
+            return None
+
+        body = json.dumps(jsonable_encoder(_shape(rows[0])), separators=(",", ":")).encode()
+        etag = compute_etag(body)
+        self._set(property_id, reviews_limit, (body, etag, time.monotonic() + settings.bundle_cache_ttl_seconds))
+        return body, etag
+
+    def _set(self, property_id: str, reviews_limit: int, entry: tuple):
+        """Store an entry, evicting the least recently used properties when full"""
+        self._entries.setdefault(property_id, {})[reviews_limit] = entry
+        self._entries.move_to_end(property_id)
+        while len(self._entries) > settings.bundle_cache_max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, property_id):
+        """Drop a property's bundles after a write that changes what they show"""
+        if property_id is not None:
+            self._entries.pop(str(property_id), None)
+
+    def metrics(self) -> dict:
+        """Hit/miss counters and current size"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified
+        }
+
+
+bundle_cache = BundleCache()
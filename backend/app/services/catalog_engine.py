@@ -0,0 +1,382 @@
+import asyncio
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.utils.amenities import amenities_mask
+from app.utils.pagination import decode_cursor, encode_cursor
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency - the engine stays disabled without it
+    np = None
+
+# Same earth radius MongoDB uses for spherical $geoNear distances
+EARTH_RADIUS_M = 6378100.0
+INITIAL_CAPACITY = 1024
+# Filter fields answered by range comparisons on a column
+RANGE_COLUMNS = {"price_per_night": "price", "max_guests": "guests", "rating_avg": "rating"}
+# Filter fields answered by comparing dictionary codes
+CODE_COLUMNS = {
+    "property_type": "type",
+    "location.city_key": "city",
+    "location.near_park_key": "park",
+    "location.address_key": "address"
+}
+COLUMN_TYPES = {
+    "price": "float64",
+    "guests": "int32",
+    "type": "int32",
+    "city": "int32",
+    "park": "int32",
+    "address": "int32",
+    "amenities": "int64",
+    "lat": "float64",
+    "lng": "float64",
+    "rating": "float64",
+    "rank": "int64",
+    "alive": "bool",
+}
+
+
+def _top_k(primary, rank, k: int, descending: bool):
+    """Positions of the first k rows ordered by primary, then rank, without a full sort"""
+    if descending:
+        primary, rank = -primary, -rank
+    if k < len(primary):
+        threshold = np.partition(primary, k - 1)[k - 1]
+        candidates = np.flatnonzero(primary <= threshold)
+    else:
+        candidates = np.arange(len(primary))
+    order = np.lexsort((rank[candidates], primary[candidates]))
+    return candidates[order[:k]]
+
+
+class CatalogEngine:
+    """Columnar in-memory copy of the active property catalog.
+
+    Active properties are held as NumPy column arrays (price, guests, type,
+    city and park codes, amenity bits, coordinates, rating), with the full
+    documents kept alongside. Listing and search filters become vectorised
+    boolean masks, and only the requested page is ordered. Property and
+    review writes apply updates incrementally. Each worker also reloads the
+    catalog every columnar_reload_seconds to pick up writes handled by other
+    workers.
+
+    search() returns None for anything it cannot answer (text search, facets,
+    unknown filters), and the routes then fall back to MongoDB, as they do
+    when COLUMNAR_SEARCH is off or NumPy is not installed.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._reload_task: Optional[asyncio.Task] = None
+        self.queries = 0
+        self.fallbacks = 0
+        self._clear()
+
+    def _clear(self):
+        self._size = 0
+        self._cols: Dict[str, "np.ndarray"] = {}
+        self._ids: List[Optional[str]] = []
+        self._docs: List[Optional[dict]] = []
+        self._row_of: Dict[str, int] = {}
+        self._codes: Dict[str, Dict[str, int]] = {"type": {}, "city": {}, "park": {}, "address": {}}
+        self._max_id = ""
+        self._next_rank = 0
+        self._ranks_stale = False
+        self._dead = 0
+        if np is not None:
+            self._cols = {name: np.zeros(INITIAL_CAPACITY, dtype) for name, dtype in COLUMN_TYPES.items()}
+
+    async def load(self, db):
+        """Snapshot every active property into fresh columns"""
+        if np is None:
+            print("Columnar search disabled: numpy is not installed")
+            return
+        properties = await db.properties.find({"is_active": True}).sort("_id", ASCENDING).to_list(None)
+        # Swap in the new snapshot without yielding, so searches never see a partial load
+        self._clear()
+        for prop in properties:
+            self.upsert(prop)
+        self.enabled = True
+        print(f"Loaded columnar catalog: {len(self._row_of)} active properties")
+
+    def _code(self, kind: str, value: Optional[str]) -> int:
+        """Dictionary code for a categorical value (-1 when missing)"""
+        if not value:
+            return -1
+        codes = self._codes[kind]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    def _grow(self):
+        """Double the column capacity"""
+        for name, column in self._cols.items():
+            grown = np.zeros(len(column) * 2, column.dtype)
+            grown[:len(column)] = column
+            self._cols[name] = grown
+
+    def upsert(self, prop: dict):
+        """Add or overwrite a property, or drop it if it is no longer active"""
+        if np is None:
+            return
+        property_id = str(prop["_id"])
+        if not prop.get("is_active", True):
+            self.remove(property_id)
+            return
+
+        row = self._row_of.get(property_id)
+        if row is None:
+            if self._size == len(self._cols["alive"]):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._ids.append(property_id)
+            self._docs.append(None)
+            self._row_of[property_id] = row
+            # New ObjectIds normally sort last; anything else forces a re-rank
+            if property_id > self._max_id:
+                self._max_id = property_id
+                self._cols["rank"][row] = self._next_rank
+                self._next_rank += 1
+            else:
+                self._ranks_stale = True
+
+        location = prop.get("location") or {}
+        cols = self._cols
+        cols["price"][row] = prop.get("price_per_night", 0)
+        cols["guests"][row] = prop.get("max_guests", 0)
+        cols["type"][row] = self._code("type", prop.get("property_type"))
+        cols["city"][row] = self._code("city", location.get("city_key"))
+        cols["park"][row] = self._code("park", location.get("near_park_key"))
+        cols["address"][row] = self._code("address", location.get("address_key"))
+        cols["amenities"][row] = prop.get("amenities_mask", amenities_mask(prop.get("amenities") or {}))
+        cols["lat"][row] = location["latitude"] if location.get("latitude") is not None else np.nan
+        cols["lng"][row] = location["longitude"] if location.get("longitude") is not None else np.nan
+        cols["rating"][row] = prop.get("rating_avg", 0.0)
+        cols["alive"][row] = True
+        self._docs[row] = prop
+
+    def remove(self, property_id):
+        """Drop a property (no-op if it is not loaded)"""
+        row = self._row_of.pop(str(property_id), None)
+        if row is None:
+            return
+        self._cols["alive"][row] = False
+        self._docs[row] = None
+        self._dead += 1
+        # Compact once a quarter of the rows are dead
+        if self._dead > max(self._size // 4, 64):
+            self._compact()
+
+    def _compact(self):
+        """Rebuild the columns without dead rows"""
+        docs = [doc for doc in self._docs[:self._size] if doc is not None]
+        docs.sort(key=lambda doc: str(doc["_id"]))
+        self._clear()
+        for doc in docs:
+            self.upsert(doc)
+
+    async def refresh(self, db, property_id):
+        """Reload one property after a write the caller has no document for"""
+        if not self.enabled:
+            return
+        prop = await db.properties.find_one({"_id": ObjectId(property_id)})
+        if prop is None:
+            self.remove(property_id)
+        else:
+            self.upsert(prop)
+
+    def _rerank(self):
+        """Recompute the _id order ranks after an out-of-order insert"""
+        ids = np.array([property_id or "" for property_id in self._ids[:self._size]])
+        ranks = np.empty(self._size, dtype="int64")
+        ranks[np.argsort(ids, kind="stable")] = np.arange(self._size)
+        self._cols["rank"][:self._size] = ranks
+        self._next_rank = self._size
+        self._max_id = max((property_id for property_id in self._ids if property_id), default="")
+        self._ranks_stale = False
+
+    def _mask(self, filter_query: dict):
+        """Boolean row mask for a MongoDB filter built by the property routes, or None if unsupported"""
+        n = self._size
+        cols = self._cols
+        mask = cols["alive"][:n].copy()
+        for field, condition in filter_query.items():
+            if field == "is_active":
+                if condition is not True:
+                    return None
+            elif field in CODE_COLUMNS:
+                if not isinstance(condition, str):
+                    return None
+                kind = CODE_COLUMNS[field]
+                mask &= cols[kind][:n] == self._codes[kind].get(condition, -2)
+            elif field in RANGE_COLUMNS:
+                column = cols[RANGE_COLUMNS[field]][:n]
+                for op, value in condition.items():
+                    if op == "$gte":
+                        mask &= column >= value
+                    elif op == "$lte":
+                        mask &= column <= value
+                    else:
+                        return None
+            elif field == "amenities_mask":
+                (op, bits), = condition.items()
+                selected = cols["amenities"][:n] & bits
+                if op == "$bitsAllSet":
+                    mask &= selected == bits
+                elif op == "$bitsAnySet":
+                    mask &= selected != 0
+                else:
+                    return None
+            elif field == "$or":
+                # The location filter: city key OR address key
+                either = np.zeros(n, dtype=bool)
+                for clause in condition:
+                    clause_mask = self._mask(clause)
+                    if clause_mask is None:
+                        return None
+                    either |= clause_mask
+                mask &= either
+            elif field == "_id" and list(condition) == ["$nin"]:
+                rows = [self._row_of[str(i)] for i in condition["$nin"] if str(i) in self._row_of]
+                mask[rows] = False
+            else:
+                return None
+        return mask
+
+    def _distances(self, rows, lng: float, lat: float):
+        """Great-circle distances in metres from a point to each row"""
+        lat1, lng1 = np.radians(lat), np.radians(lng)
+        lat2 = np.radians(self._cols["lat"][rows])
+        lng2 = np.radians(self._cols["lng"][rows])
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+    def search(
+        self,
+        filter_query: dict,
+        sort_field: str = "_id",
+        direction: int = ASCENDING,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        geo: Optional[dict] = None
+    ) -> Optional[Tuple[List[dict], Optional[str]]]:
+        """(documents, next cursor) for a listing query, or None to fall back to MongoDB"""
+        if not self.enabled:
+            return None
+        mask = self._mask(filter_query)
+        if mask is None or (sort_field, direction) not in (("_id", ASCENDING), ("rating_avg", DESCENDING)):
+            self.fallbacks += 1
+            return None
+        self.queries += 1
+        if self._ranks_stale:
+            self._rerank()
+
+        cols = self._cols
+        if geo and geo["bbox"]:
+            min_lng, min_lat, max_lng, max_lat = geo["bbox"]
+            n = self._size
+            mask &= (cols["lng"][:n] >= min_lng) & (cols["lng"][:n] <= max_lng)
+            mask &= (cols["lat"][:n] >= min_lat) & (cols["lat"][:n] <= max_lat)
+        rows = np.flatnonzero(mask)
+        rank = cols["rank"][rows]
+
+        # Primary sort key and direction, mirroring the MongoDB paths
+        distance = None
+        if geo:
+            distance = self._distances(rows, geo["lng"], geo["lat"])
+            keep = ~np.isnan(distance)
+            if geo["radius_m"] is not None:
+                keep &= distance <= geo["radius_m"]
+            rows, rank, distance = rows[keep], rank[keep], distance[keep]
+            primary, descending = distance, False
+        elif sort_field == "rating_avg":
+            primary, descending = cols["rating"][rows], True
+        else:
+            primary, descending = rank, False
+
+        if cursor:
+            last_value, last_id = decode_cursor(cursor)
+            if last_value is None:
+                # Missing values are stored as 0 in the columns
+                last_value = 0.0
+            last_row = self._row_of.get(str(last_id))
+            if last_row is not None:
+                last_rank = cols["rank"][last_row]
+                after_id = rank < last_rank if descending else rank > last_rank
+            else:
+                ids = np.array([self._ids[row] for row in rows])
+                after_id = ids < str(last_id) if descending else ids > str(last_id)
+            if primary is rank:
+                keep = after_id
+            elif descending:
+                keep = (primary < last_value) | ((primary == last_value) & after_id)
+            else:
+                keep = (primary > last_value) | ((primary == last_value) & after_id)
+            rows, rank, primary = rows[keep], rank[keep], primary[keep]
+            if distance is not None:
+                distance = distance[keep]
+            skip = 0
+
+        page = _top_k(primary, rank, skip + limit, descending)[skip:]
+
+        documents = []
+        for position in page:
+            doc = dict(self._docs[rows[position]])
+            if distance is not None:
+                doc["distance"] = float(distance[position])
+            documents.append(doc)
+
+        page_cursor = None
+        if len(documents) == limit:
+            last = page[-1]
+            if geo:
+                sort_value = float(distance[last])
+            elif sort_field == "rating_avg":
+                sort_value = float(cols["rating"][rows[last]])
+            else:
+                sort_value = documents[-1]["_id"]
+            page_cursor = encode_cursor(sort_value, documents[-1]["_id"])
+        return documents, page_cursor
+
+    def start(self, db):
+        """Start the periodic full reload"""
+        if self.enabled and self._reload_task is None and settings.columnar_reload_seconds > 0:
+            self._reload_task = asyncio.create_task(self._reload_loop(db))
+
+    async def stop(self):
+        """Stop the reload task"""
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+
+    async def _reload_loop(self, db):
+        """Reload the catalog every columnar_reload_seconds"""
+        while True:
+            await asyncio.sleep(settings.columnar_reload_seconds)
+            try:
+                await self.load(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Columnar catalog reload failed: {e}")
+
+    def metrics(self) -> dict:
+        """Size and query counters"""
+        return {
+            "enabled": self.enabled,
+            "properties": len(self._row_of),
+            "queries": self.queries,
+            "fallbacks": self.fallbacks
+        }
+
+
+catalog_engine = CatalogEngine()
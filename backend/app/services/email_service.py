@@ -1,51 +1,260 @@
 import smtplib
+import threading
+import time
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.core.config import settings
-from typing import Optional
+from typing import List, Optional
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 
+class _PooledConnection:
+    """An authenticated SMTP session plus bookkeeping for recycling"""
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.messages_sent = 0
+
+
+class SMTPConnectionPool:
+    """Thread-safe pool of authenticated SMTP sessions.
+
+    Sessions are kept alive between sends so the TCP, STARTTLS and AUTH
+    handshakes are paid once per session instead of once per email. Idle
+    sessions are health-checked with NOOP before reuse and recycled after
+    a maximum age or message count.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        use_tls: bool = True,
+        size: int = 4,
+        max_age_seconds: float = 300,
+        max_messages: int = 100,
+        idle_check_seconds: float = 30,
+        timeout: float = 30
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.max_age_seconds = max_age_seconds
+        self.max_messages = max_messages
+        self.idle_check_seconds = idle_check_seconds
+        self.timeout = timeout
+        self._idle: List[_PooledConnection] = []
+        self._open = 0
+        self._condition = threading.Condition()
+
+    def _connect(self) -> _PooledConnection:
+        """Open and authenticate a new SMTP session"""
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        return _PooledConnection(server)
+
+    def _close(self, connection: _PooledConnection):
+        """Close a session, ignoring errors from an already dead connection"""
+        try:
+            connection.server.quit()
+        except Exception:
+            connection.server.close()
+
+    def _is_usable(self, connection: _PooledConnection) -> bool:
+        """Check that an idle session is still fresh and alive"""
+        now = time.monotonic()
+        if now - connection.created_at > self.max_age_seconds:
+            return False
+        if connection.messages_sent >= self.max_messages:
+            return False
+        if now - connection.last_used_at > self.idle_check_seconds:
+            try:
+                return connection.server.noop()[0] == 250
+            except Exception:
+                return False
+        return True
+
+    def _release_slot(self):
+        """Give back the slot of a session that was closed or never opened"""
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+    def _discard(self, connection: _PooledConnection):
+        """Close a session outside the lock, then free its slot"""
+        self._close(connection)
+        self._release_slot()
+
+    def _checkout(self) -> _PooledConnection:
+        """Take an idle session, open a new one, or wait for one to be returned.
+
+        Only bookkeeping happens under the lock. The NOOP health check, QUIT
+        and connect are network calls, so they run after it is released and
+        a slow SMTP server never blocks other checkouts.
+        """
+        while True:
+            with self._condition:
+                while not self._idle and self._open >= self.size:
+                    self._condition.wait()
+                if self._idle:
+                    connection = self._idle.pop()
+                else:
+                    self._open += 1
+                    connection = None
+
+            if connection is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+            if self._is_usable(connection):
+                return connection
+            self._discard(connection)
+
+    def _checkin(self, connection: _PooledConnection, broken: bool = False):
+        """Return a session to the pool (or discard it if it failed)"""
+        if broken:
+            self._discard(connection)
+            return
+        with self._condition:
+            connection.last_used_at = time.monotonic()
+            self._idle.append(connection)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a session for the duration of a with block"""
+        connection = self._checkout()
+        try:
+            yield connection
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError):
+            self._checkin(connection, broken=True)
+            raise
+        except smtplib.SMTPException:
+            # Refused recipients, sender or data are answered by the server
+            # (and reset by smtplib), so the session stays usable. SMTPException
+            # subclasses OSError, so this must come before the OSError clause.
+            self._checkin(connection)
+            raise
+        except OSError:
+            # Socket-level failure: the session is dead
+            self._checkin(connection, broken=True)
+            raise
+        except Exception:
+            self._checkin(connection)
+            raise
+        else:
+            self._checkin(connection)
+
+    def close_all(self):
+        """Close every idle session"""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+
+
 class EmailService:
     def __init__(self):
         self.smtp_server = settings.email_host
         self.smtp_port = settings.email_port
         self.email_user = settings.email_host_user
         self.email_password = settings.email_host_password
-        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.pool = SMTPConnectionPool(
+            self.smtp_server,
+            self.smtp_port,
+            self.email_user,
+            self.email_password,
+            use_tls=settings.email_use_tls,
+            size=settings.email_pool_size,
+            max_age_seconds=settings.email_connection_max_age_seconds,
+            max_messages=settings.email_connection_max_messages,
+            idle_check_seconds=settings.email_connection_idle_check_seconds
+        )
+        # One thread per pooled session
+        self.executor = ThreadPoolExecutor(max_workers=settings.email_pool_size)
+
+    def _build_message(self, to_email: str, subject: str, body: str, is_html: bool = False) -> str:
+        """Build the MIME message text"""
+        message = MIMEMultipart()
+        message["From"] = self.email_user
+        message["To"] = to_email
+        message["Subject"] = subject
+
+        # Add body
+        if is_html:
+            message.attach(MIMEText(body, "html"))
+        else:
+            message.attach(MIMEText(body, "plain"))
+        return message.as_string()
+
+    def _send_on(self, connection: _PooledConnection, to_email: str, text: str):
+        """Send one message over a pooled session"""
+        connection.server.sendmail(self.email_user, to_email, text)
+        connection.messages_sent += 1
 
     def _send_email_sync(self, to_email: str, subject: str, body: str, is_html: bool = False) -> bool:
-        """Send email synchronously"""
-        try:
-            # Create message
-            message = MIMEMultipart()
-            message["From"] = self.email_user
-            message["To"] = to_email
-            message["Subject"] = subject
-
-            # Add body
-            if is_html:
-                message.attach(MIMEText(body, "html"))
-            else:
-                message.attach(MIMEText(body, "plain"))
-
-            # Connect and send
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.email_user, self.email_password)
-            text = message.as_string()
-            server.sendmail(self.email_user, to_email, text)
-            server.quit()
-            
-            return True
-        except Exception as e:
-            print(f"Error sending email: {e}")
-            return False
+        """Send email synchronously over a pooled connection"""
+        text = self._build_message(to_email, subject, body, is_html)
+        # A pooled session can drop between the health check and the send, so retry once on a fresh one
+        for attempt in range(2):
+            try:
+                with self.pool.connection() as connection:
+                    self._send_on(connection, to_email, text)
+                return True
+            except smtplib.SMTPServerDisconnected as e:
+                if attempt == 1:
+                    print(f"Error sending email: {e}")
+            except Exception as e:
+                print(f"Error sending email: {e}")
+                return False
+        return False
+
+    def _send_batch_sync(self, messages: List[dict]) -> List[bool]:
+        """Send a batch of messages back to back over one pooled session"""
+        results = []
+        index = 0
+        while index < len(messages):
+            try:
+                with self.pool.connection() as connection:
+                    while index < len(messages):
+                        message = messages[index]
+                        text = self._build_message(
+                            message["to_email"], message["subject"], message["body"], message.get("is_html", False)
+                        )
+                        try:
+                            self._send_on(connection, message["to_email"], text)
+                            results.append(True)
+                        except smtplib.SMTPRecipientsRefused as e:
+                            print(f"Error sending email to {message['to_email']}: {e}")
+                            results.append(False)
+                        index += 1
+            except Exception as e:
+                # The session failed mid-batch: fail this message and continue on a new session
+                print(f"Error sending email to {messages[index]['to_email']}: {e}")
+                results.append(False)
+                index += 1
+        return results
 
     async def send_email(self, to_email: str, subject: str, body: str, is_html: bool = False) -> bool:
         """Send email asynchronously"""
-        loop = asyncio.get_event_loop()
+        loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
             self.executor,
             self._send_email_sync,
@@ -55,6 +264,26 @@ class EmailService:
             is_html
         )
 
+    async def send_many(self, messages: List[dict]) -> List[bool]:
+        """Send many emails, pipelining each share of the batch over one session.
+
+        Each message is a dict with to_email, subject, body and optional is_html.
+        The batch is split across the pool's sessions, so a broadcast or a
+        backlog drain runs without a handshake per message. Returns one result
+        per message, in order.
+        """
+        if not messages:
+            return []
+
+        loop = asyncio.get_running_loop()
+        chunk_count = min(self.pool.size, len(messages))
+        chunk_size = -(-len(messages) // chunk_count)  # Ceiling division
+        chunks = [messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size)]
+        chunk_results = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, self._send_batch_sync, chunk) for chunk in chunks
+        ))
+        return [result for results in chunk_results for result in results]
+
     async def send_welcome_email(self, user_email: str, user_name: str) -> bool:
         """Send welcome email to new user"""
         subject = "Welcome to Wild Welcome!"
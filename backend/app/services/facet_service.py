@@ -0,0 +1,115 @@
+import time
+from typing import Optional
+from app.core.config import settings
+from app.models.property import Amenities
+
+# Lower bounds of the price and guest bands; the last band is open-ended
+PRICE_BANDS = [0, 50, 100, 200, 500]
+GUEST_BANDS = [1, 3, 5, 9]
+AMENITY_NAMES = list(Amenities.model_fields)
+
+
+def _bucket(field: str, boundaries: list) -> list:
+    """$bucket sub-pipeline counting documents per band, open-ended past the last bound"""
+    return [{
+        "$bucket": {
+            "groupBy": f"${field}",
+            "boundaries": boundaries,
+            "default": boundaries[-1],
+            "output": {"count": {"$sum": 1}}
+        }
+    }]
+
+
+def facet_stages() -> dict:
+    """$facet sub-pipelines counting the filter values across a result set"""
+    return {
+        "total": [{"$count": "count"}],
+        "property_type": [
+            {"$group": {"_id": "$property_type", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}}
+        ],
+        "near_park": [
+            {"$match": {"location.near_park_key": {"$type": "string"}}},
+            {"$group": {"_id": "$location.near_park_key", "label": {"$first": "$location.near_park"}, "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}}
+        ],
+        "price": _bucket("price_per_night", PRICE_BANDS),
+        "guests": _bucket("max_guests", GUEST_BANDS),
+        "amenities": [{
+            "$group": {
+                "_id": None,
+                **{
+                    name: {"$sum": {"$cond": [{"$eq": [f"$amenities.{name}", True]}, 1, 0]}}
+                    for name in AMENITY_NAMES
+                }
+            }
+        }]
+    }
+
+
+def _bands(rows: list, boundaries: list) -> list:
+    """Turn $bucket rows into min/max bands, including empty ones"""
+    counts = {row["_id"]: row["count"] for row in rows}
+    return [
+        {
+            "min": lower,
+            "max": boundaries[i + 1] if i + 1 < len(boundaries) else None,
+            "count": counts.get(lower, 0)
+        }
+        for i, lower in enumerate(boundaries)
+    ]
+
+
+def shape_facets(raw: dict) -> dict:
+    """Convert raw $facet output into the SearchFacets response shape"""
+    amenities = raw["amenities"][0] if raw["amenities"] else {}
+    return {
+        "total": raw["total"][0]["count"] if raw["total"] else 0,
+        "property_type": [{"value": row["_id"], "count": row["count"]} for row in raw["property_type"]],
+        "near_park": [
+            {"value": row["_id"], "label": row.get("label"), "count": row["count"]}
+            for row in raw["near_park"]
+        ],
+        "price": _bands(raw["price"], PRICE_BANDS),
+        "guests": _bands(raw["guests"], GUEST_BANDS),
+        "amenities": {name: amenities.get(name, 0) for name in AMENITY_NAMES}
+    }
+
+
+class FacetCache:
+    """Cached facet counts for the unfiltered catalog of active properties.
+
+    The search page opens with no filters, so those counts are served from
+    memory for facet_cache_ttl_seconds, and property writes invalidate them.
+    Filtered counts are computed in the same $facet aggregation as the
+    result page.
+    """
+
+    def __init__(self):
+        self._facets: Optional[dict] = None
+        self._expires_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db) -> dict:
+        """Facet counts across every active property"""
+        if self._facets is not None and time.monotonic() < self._expires_at:
+            self.hits += 1
+            return self._facets
+
+        self.misses += 1
+        rows = await db.properties.aggregate([
+            {"$match": {"is_active": True}},
+            {"$facet": facet_stages()}
+        ]).to_list(None)
+        self._facets = shape_facets(rows[0])
+        self._expires_at = time.monotonic() + settings.facet_cache_ttl_seconds
+        return self._facets
+
+    def invalidate(self):
+        """Drop the cached counts after a property write"""
+        self._facets = None
+
+
+facet_cache = FacetCache()
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import time
+from fastapi.encoders import jsonable_encoder
+from typing import Optional, Tuple
+from app.core.config import settings
+from app.models.property import Property
+from app.models.review import Review
+from app.services.stats_service import stats_service
+from app.utils.etag import compute_etag
+
+FEATURED_PROPERTIES_LIMIT = 6
+FEATURED_REVIEWS_LIMIT = 3
+# Wait this long after a write before rebuilding, so bursts of writes cost one rebuild
+REBUILD_DEBOUNCE_SECONDS = 1.0
+
+
+class HomeSnapshot:
+    """In-memory snapshot of everything the landing page shows.
+
+    The snapshot holds featured properties, featured reviews and the
+    platform stats, pre-serialised to JSON with a content ETag, so GET
+    /api/home serves anonymous traffic without touching MongoDB. A
+    background task rebuilds it every home_snapshot_refresh_seconds, and
+    property and review writes call invalidate() to trigger a debounced
+    rebuild. Each worker process keeps its own snapshot.
+    """
+
+    def __init__(self):
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.built_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._dirty: Optional[asyncio.Event] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.builds = 0
+        self.hits = 0
+        self.not_modified = 0
+
+    async def _build(self, db):
+        """Query the homepage data and swap in a new snapshot"""
+        properties = await db.properties.find(
+            {"is_active": True, "is_featured": True}
+        ).sort("created_at", -1).limit(FEATURED_PROPERTIES_LIMIT).to_list(None)
+        reviews = await db.reviews.find(
+            {"is_approved": True, "is_featured": True}
+        ).sort("created_at", -1).limit(FEATURED_REVIEWS_LIMIT).to_list(None)
+        stats = await stats_service.get(db)
+
+        featured_properties = []
+        for prop in properties:
+            prop["id"] = str(prop.pop("_id"))
+            prop["landlord_id"] = str(prop["landlord_id"])
+            featured_properties.append(Property(**prop))
+        featured_reviews = []
+        for review in reviews:
+            review["id"] = str(review.pop("_id"))
+            featured_reviews.append(Review(**review))
+
+        payload = jsonable_encoder({
+            "featured_properties": featured_properties,
+            "featured_reviews": featured_reviews,
+            "stats": stats
+        })
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        self.body = body
+        self.etag = compute_etag(body)
+        self.built_at = time.monotonic()
+        self.builds += 1
+
+    async def get(self, db) -> Tuple[bytes, str]:
+        """Current snapshot body and ETag, building it on first use"""
+        if self.body is None:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                # Another request may have built it while we waited
+                if self.body is None:
+                    await self._build(db)
+        self.hits += 1
+        return self.body, self.etag
+
+    def invalidate(self):
+        """Rebuild soon because featured properties or reviews may have changed"""
+        if self._dirty is not None:
+            self._dirty.set()
+        else:
+            # No refresh task running: rebuild on the next request
+            self.body = None
+
+    def start(self, db):
+        """Start the scheduled rebuild task"""
+        if self._refresh_task is None:
+            self._dirty = asyncio.Event()
+            self._refresh_task = asyncio.create_task(self._refresh_loop(db))
+
+    async def stop(self):
+        """Stop the rebuild task"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+            self._dirty = None
+
+    async def _refresh_loop(self, db):
+        """Rebuild on a schedule, or shortly after a write invalidates the snapshot"""
+        while True:
+            try:
+                await self._build(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Home snapshot rebuild failed: {e}")
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=settings.home_snapshot_refresh_seconds)
+                await asyncio.sleep(REBUILD_DEBOUNCE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._dirty.clear()
+
+    def metrics(self) -> dict:
+        """Build and request counters"""
+        return {
+            "builds": self.builds,
+            "hits": self.hits,
+            "not_modified": self.not_modified,
+            "age_seconds": round(time.monotonic() - self.built_at, 1) if self.body else None
+        }
+
+
+home_snapshot = HomeSnapshot()
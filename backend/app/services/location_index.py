@@ -0,0 +1,91 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Tuple
+from app.utils.text import normalize_key
+
+# Location fields offered as suggestions, and the suggestion type for each
+SUGGESTION_FIELDS = (("city", "city"), ("near_park", "park"), ("address", "address"))
+
+
+class LocationIndex:
+    """In-memory prefix index of the cities, parks and addresses of active listings.
+
+    Every name is stored under its normalized key (see normalize_key) in a
+    sorted list, so a prefix lookup is a binary search followed by a short
+    scan, and each key tracks how many active listings use it. The index is
+    loaded once at startup and kept current by the property routes. Each
+    worker process holds its own copy.
+    """
+
+    def __init__(self):
+        # Sorted (type, key) pairs for prefix range scans
+        self._keys: List[Tuple[str, str]] = []
+        # (type, key) -> [display label, listing count]
+        self._entries: Dict[Tuple[str, str], list] = {}
+        # property_id -> (type, key) pairs it contributes, so updates can undo them
+        self._property_entries: Dict[str, List[Tuple[str, str]]] = {}
+        self.loaded = False
+
+    async def load(self, db):
+        """Index every active property"""
+        self._keys = []
+        self._entries = {}
+        self._property_entries = {}
+        cursor = db.properties.find({"is_active": True}, {"location": 1, "is_active": 1})
+        async for prop in cursor:
+            self.upsert(prop)
+        self.loaded = True
+        print(f"Loaded location index: {len(self._entries)} names from {len(self._property_entries)} properties")
+
+    def upsert(self, prop: dict):
+        """Add, move or drop a property depending on its current location and status"""
+        property_id = str(prop["_id"])
+        self.remove(property_id)
+        if not prop.get("is_active", True):
+            return
+
+        location = prop.get("location") or {}
+        contributed = []
+        for field, suggestion_type in SUGGESTION_FIELDS:
+            label = (location.get(field) or "").strip()
+            key = normalize_key(label)
+            if not key:
+                continue
+            entry_key = (suggestion_type, key)
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                self._entries[entry_key] = [label, 1]
+                insort(self._keys, entry_key)
+            else:
+                entry[1] += 1
+            contributed.append(entry_key)
+        self._property_entries[property_id] = contributed
+
+    def remove(self, property_id):
+        """Drop a property from the index (no-op if it is not tracked)"""
+        for entry_key in self._property_entries.pop(str(property_id), []):
+            entry = self._entries[entry_key]
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._entries[entry_key]
+                del self._keys[bisect_left(self._keys, entry_key)]
+
+    def suggest(self, prefix: str, limit: int = 8, types: Tuple[str, ...] = ("city", "park", "address")) -> List[dict]:
+        """Names starting with prefix, most listings first"""
+        key_prefix = normalize_key(prefix)
+        if not key_prefix:
+            return []
+
+        matches = []
+        for suggestion_type in types:
+            start = bisect_left(self._keys, (suggestion_type, key_prefix))
+            for entry_key in self._keys[start:]:
+                if entry_key[0] != suggestion_type or not entry_key[1].startswith(key_prefix):
+                    break
+                label, count = self._entries[entry_key]
+                matches.append({"type": suggestion_type, "label": label, "key": entry_key[1], "count": count})
+
+        matches.sort(key=lambda match: (-match["count"], match["label"]))
+        return matches[:limit]
+
+
+location_index = LocationIndex()
@@ -0,0 +1,235 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Dict, Optional
+from app.core.config import settings
+from app.services.email_service import email_service
+from app.services.sms_service import sms_service
+
+
+# Notification kind -> coroutine that delivers it from its stored payload.
+# Each returns True on success, matching the email/SMS service methods.
+HANDLERS = {
+    "welcome_email": lambda p: email_service.send_welcome_email(p["user_email"], p["user_name"]),
+    "booking_confirmation_email": lambda p: email_service.send_booking_confirmation(
+        p["user_email"], p["user_name"], p["booking_details"]
+    ),
+    "password_reset_email": lambda p: email_service.send_password_reset(p["user_email"], p["reset_token"]),
+    "booking_confirmation_sms": lambda p: sms_service.send_booking_confirmation_sms(
+        p["phone_number"], p["booking_details"]
+    ),
+}
+
+# How long a worker owns a claimed message before another worker may retry it
+LEASE_SECONDS = 120
+MAX_BACKOFF_SECONDS = 3600
+
+
+class NotificationOutbox:
+    """Mongo-backed outbox for emails and SMS.
+
+    Request handlers enqueue() a message and return immediately. A pool of
+    async workers claims due messages with find_one_and_update, delivers them
+    and retries failures with exponential backoff. Messages carrying a
+    dedupe_key are enqueued at most once.
+    """
+
+    def __init__(self):
+        self.db = None
+        self._workers = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = False
+        # In-process delivery metrics
+        self.sent_count = 0
+        self.failed_count = 0
+        self.retry_count = 0
+        self._latencies = deque(maxlen=1000)
+        self.worker_error_count = 0
+        self.record_error_count = 0
+        # Delivered messages whose sent status could not be stored yet: _id -> sent_at
+        self._unrecorded_sent: Dict[object, datetime] = {}
+
+    async def enqueue(self, db, kind: str, payload: dict, dedupe_key: Optional[str] = None) -> bool:
+        """Queue a notification for delivery. Returns False if it was a duplicate."""
+        now = datetime.utcnow()
+        message = {
+            "kind": kind,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            "updated_at": now
+        }
+        if dedupe_key:
+            message["dedupe_key"] = dedupe_key
+
+        try:
+            await db.notification_outbox.insert_one(message)
+        except DuplicateKeyError:
+            return False
+
+        if self._wakeup:
+            self._wakeup.set()
+        return True
+
+    def start(self, db, concurrency: Optional[int] = None):
+        """Start the worker pool"""
+        if self._running:
+            return
+        self.db = db
+        self._running = True
+        self._wakeup = asyncio.Event()
+        concurrency = concurrency or settings.notification_workers
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(concurrency)]
+        print(f"Started {concurrency} notification workers")
+
+    async def stop(self):
+        """Stop the worker pool, letting in-flight deliveries finish"""
+        self._running = False
+        if self._wakeup:
+            self._wakeup.set()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _claim(self) -> Optional[dict]:
+        """Atomically take the oldest due message (or one whose lease expired)"""
+        now = datetime.utcnow()
+        return await self.db.notification_outbox.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "pending", "next_attempt_at": {"$lte": now}},
+                    {"status": "processing", "locked_until": {"$lte": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": "processing",
+                    "locked_until": now + timedelta(seconds=LEASE_SECONDS),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _worker(self):
+        """Deliver messages until stopped"""
+        while self._running:
+            if self._unrecorded_sent:
+                await self._retry_unrecorded()
+            try:
+                message = await self._claim()
+            except Exception as e:
+                print(f"Notification outbox claim failed: {e}")
+                message = None
+
+            if message is None:
+                # Nothing due: sleep until the poll interval passes or a message is enqueued
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.notification_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._deliver(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep the worker alive; the message is retried once its lease expires
+                self.worker_error_count += 1
+                print(f"Notification outbox delivery of {message.get('_id')} failed: {e}")
+
+    async def _record_sent(self, message_id, sent_at: datetime) -> bool:
+        """Mark a delivered message as sent. On failure, remember it so it is never sent again"""
+        try:
+            await self.db.notification_outbox.update_one(
+                {"_id": message_id},
+                {"$set": {"status": "sent", "sent_at": sent_at, "updated_at": sent_at}, "$unset": {"locked_until": ""}}
+            )
+        except Exception as e:
+            self.record_error_count += 1
+            self._unrecorded_sent[message_id] = sent_at
+            print(f"Notification outbox could not mark {message_id} as sent: {e}")
+            return False
+        self._unrecorded_sent.pop(message_id, None)
+        return True
+
+    async def _retry_unrecorded(self):
+        """Retry marking messages that were delivered but not yet recorded as sent"""
+        for message_id, sent_at in list(self._unrecorded_sent.items()):
+            if not await self._record_sent(message_id, sent_at):
+                return
+
+    async def _deliver(self, message: dict):
+        """Send one message and record the outcome"""
+        if message["_id"] in self._unrecorded_sent:
+            # Already delivered; its lease expired before the sent status could be stored
+            await self._record_sent(message["_id"], self._unrecorded_sent[message["_id"]])
+            return
+
+        handler = HANDLERS.get(message["kind"])
+        error = None
+        try:
+            if handler is None:
+                raise ValueError(f"Unknown notification kind: {message['kind']}")
+            delivered = await handler(message["payload"])
+            if not delivered:
+                error = "delivery returned False"
+        except Exception as e:
+            error = str(e)
+
+        now = datetime.utcnow()
+        if error is None:
+            self.sent_count += 1
+            self._latencies.append((now - message["created_at"]).total_seconds())
+            await self._record_sent(message["_id"], now)
+            return
+
+        if handler is None or message["attempts"] >= settings.notification_max_attempts:
+            self.failed_count += 1
+            update = {"status": "failed", "last_error": error, "updated_at": now}
+        else:
+            self.retry_count += 1
+            backoff = min(settings.notification_retry_base_seconds * 2 ** (message["attempts"] - 1), MAX_BACKOFF_SECONDS)
+            update = {
+                "status": "pending",
+                "last_error": error,
+                "next_attempt_at": now + timedelta(seconds=backoff),
+                "updated_at": now
+            }
+        await self.db.notification_outbox.update_one(
+            {"_id": message["_id"]},
+            {"$set": update, "$unset": {"locked_until": ""}}
+        )
+
+    async def metrics(self, db) -> dict:
+        """Queue depth and delivery latency"""
+        latencies = sorted(self._latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        return {
+            "queue_depth": await db.notification_outbox.count_documents({"status": {"$in": ["pending", "processing"]}}),
+            "failed_total": await db.notification_outbox.count_documents({"status": "failed"}),
+            "workers": len(self._workers),
+            "sent": self.sent_count,
+            "failed": self.failed_count,
+            "retried": self.retry_count,
+            "worker_errors": self.worker_error_count,
+            "record_errors": self.record_error_count,
+            "unrecorded_sent": len(self._unrecorded_sent),
+            "latency_seconds_p50": percentile(0.5),
+            "latency_seconds_p95": percentile(0.95)
+        }
+
+
+notification_outbox = NotificationOutbox()
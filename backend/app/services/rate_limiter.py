@@ -0,0 +1,185 @@
+import math
+import time
+from datetime import datetime, timedelta
+from fastapi import HTTPException, Request, status
+from pymongo import ReturnDocument
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.database.mongodb import get_database
+
+# Rule name -> scope -> (max requests, window seconds). /auth/token shares the
+# login rule so both login endpoints draw on the same budget.
+RULES: Dict[str, Dict[str, Tuple[int, int]]] = {
+    "login": {"ip": (20, 60), "email": (5, 60)},
+    "register": {"ip": (10, 3600)},
+    "forgot_password": {"ip": (5, 900), "email": (3, 900)},
+}
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """Remote address of the caller, honouring X-Forwarded-For behind a trusted proxy"""
+    if settings.rate_limit_trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+
+def _retry_after(limit: int, window: int, elapsed: float, current: int, previous: int) -> float:
+    """Seconds until a sliding window estimate drops back below the limit"""
+    if current >= limit or previous == 0:
+        return window - elapsed
+    # previous * (1 - (elapsed + t) / window) + current < limit
+    return max(window * (1 - (limit - current) / previous) - elapsed, 0) + 0.001
+
+
+class MemoryRateLimitBackend:
+    """Sliding window counters held in this process.
+
+    Each key keeps the counts for the current and previous fixed window, and
+    the previous count is weighted by how much of it still overlaps the
+    sliding window. A check is a dict lookup and a little arithmetic. Each
+    worker process counts separately, so with several workers the effective
+    limit is multiplied by the worker count.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> [window index, current count, previous count]
+        self._windows: Dict[str, list] = {}
+
+    async def hit(self, key: str, limit: int, window: int) -> float:
+        """Count a request, or return the seconds to wait if it is over the limit"""
+        now = time.time()
+        index = int(now // window)
+        elapsed = now - index * window
+
+        entry = self._windows.get(key)
+        if entry is None:
+            if len(self._windows) >= self.max_keys:
+                self._prune(now)
+            entry = self._windows[key] = [index, 0, 0]
+        elif entry[0] != index:
+            entry[2] = entry[1] if entry[0] == index - 1 else 0
+            entry[1] = 0
+            entry[0] = index
+
+        estimate = entry[2] * (1 - elapsed / window) + entry[1]
+        if estimate >= limit:
+            return _retry_after(limit, window, elapsed, entry[1], entry[2])
+        entry[1] += 1
+        return 0
+
+    def _prune(self, now: float):
+        """Drop keys whose windows have fully slid out"""
+        stale = [
+            key for key, (index, _, _) in self._windows.items()
+            if index < int(now // self._window_of(key)) - 1
+        ]
+        for key in stale:
+            del self._windows[key]
+        # Still full of live keys: start over rather than grow without bound
+        if len(self._windows) >= self.max_keys:
+            self._windows.clear()
+
+    @staticmethod
+    def _window_of(key: str) -> int:
+        """Window length encoded at the end of a key"""
+        return int(key.rsplit(":", 1)[1])
+
+    def size(self) -> int:
+        """Number of tracked keys"""
+        return len(self._windows)
+
+
+class MongoRateLimitBackend:
+    """Sliding window counters shared by every worker through MongoDB.
+
+    One small document per key and fixed window, deleted by a TTL index on
+    expires_at once it can no longer affect the sliding window. Rejected
+    requests are counted too, so a client that keeps hammering stays blocked.
+    """
+
+    async def hit(self, key: str, limit: int, window: int) -> float:
+        """Count a request, or return the seconds to wait if it is over the limit"""
+        db = await get_database()
+        now = time.time()
+        index = int(now // window)
+        elapsed = now - index * window
+
+        current = await db.rate_limits.find_one_and_update(
+            {"_id": f"{key}:{index}"},
+            {
+                "$inc": {"count": 1},
+                "$setOnInsert": {"expires_at": datetime.utcnow() + timedelta(seconds=2 * window)}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        previous = await db.rate_limits.find_one({"_id": f"{key}:{index - 1}"}, {"count": 1})
+        current_count = current["count"] - 1
+        previous_count = previous["count"] if previous else 0
+
+        estimate = previous_count * (1 - elapsed / window) + current_count
+        if estimate >= limit:
+            return _retry_after(limit, window, elapsed, current_count, previous_count)
+        return 0
+
+    def size(self) -> Optional[int]:
+        """Keys live in MongoDB, not in this process"""
+        return None
+
+
+BACKENDS = {
+    "memory": MemoryRateLimitBackend,
+    "mongo": MongoRateLimitBackend,
+}
+
+
+class RateLimiter:
+    """Throttles the auth endpoints that cost bcrypt work or send email.
+
+    Each rule limits requests per client IP and, where the endpoint names an
+    account, per email address, so a credential stuffing burst is capped
+    from both sides. Over the limit, check() raises 429 with a Retry-After
+    header. The backend is chosen by RATE_LIMIT_BACKEND and any object with
+    an async hit(key, limit, window) method can be plugged in.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or BACKENDS[settings.rate_limit_backend]()
+        self.checks = 0
+        self.rejections = 0
+
+    async def check(self, request: Request, rule: str, email: Optional[str] = None):
+        """Count a request against a rule, raising 429 if any scope is over its limit"""
+        if not settings.rate_limit_enabled:
+            return
+        self.checks += 1
+
+        identities = {"ip": client_ip(request), "email": email.strip().lower() if email else None}
+        for scope, (limit, window) in RULES[rule].items():
+            identity = identities.get(scope)
+            if not identity:
+                continue
+            retry_after = await self.backend.hit(f"{rule}:{scope}:{identity}:{window}", limit, window)
+            if retry_after:
+                self.rejections += 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests, please try again later",
+                    headers={"Retry-After": str(max(math.ceil(retry_after), 1))}
+                )
+
+    def metrics(self) -> dict:
+        """Check and rejection counters"""
+        return {
+            "enabled": settings.rate_limit_enabled,
+            "backend": settings.rate_limit_backend,
+            "checks": self.checks,
+            "rejections": self.rejections,
+            "tracked_keys": self.backend.size()
+        }
+
+
+rate_limiter = RateLimiter()
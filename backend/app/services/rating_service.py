@@ -0,0 +1,117 @@
+from bson import ObjectId
+from collections import defaultdict
+from pymongo import UpdateOne
+from typing import Dict, Optional
+from app.services.catalog_engine import catalog_engine
+
+RATINGS = (1, 2, 3, 4, 5)
+
+
+def empty_rating_fields() -> dict:
+    """Rating aggregate fields for a property with no reviews"""
+    return {
+        "rating_avg": 0.0,
+        "rating_count": 0,
+        "rating_sum": 0,
+        "rating_histogram": {str(rating): 0 for rating in RATINGS}
+    }
+
+
+def _contribution(review: Optional[dict]) -> Optional[tuple]:
+    """(property_id, rating) a review adds to its property's aggregates, if any"""
+    if not review or not review.get("is_approved") or not review.get("property_id"):
+        return None
+    if not ObjectId.is_valid(review["property_id"]):
+        return None
+    return review["property_id"], review["rating"]
+
+
+def _average_stage() -> dict:
+    """Pipeline stage recomputing rating_avg from rating_sum and rating_count"""
+    return {
+        "$set": {
+            "rating_avg": {
+                "$cond": [
+                    {"$gt": ["$rating_count", 0]},
+                    {"$round": [{"$divide": ["$rating_sum", "$rating_count"]}, 2]},
+                    0.0
+                ]
+            }
+        }
+    }
+
+
+class RatingService:
+    """Keeps rating_avg, rating_count and a 1-5 rating_histogram on each property.
+
+    Only approved reviews attached to a property count. Every review write
+    passes the document before and after the change to apply(), which
+    turns the difference into per-property deltas and applies each one as a
+    single pipeline update. The counters and the average therefore change
+    together, with no read-modify-write race between concurrent reviews.
+    """
+
+    async def apply(self, db, before: Optional[dict], after: Optional[dict]):
+        """Update property aggregates for a review going from before to after"""
+        old = _contribution(before)
+        new = _contribution(after)
+        if old == new:
+            return
+
+        deltas: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        if old:
+            deltas[old[0]]["count"] -= 1
+            deltas[old[0]]["sum"] -= old[1]
+            deltas[old[0]][str(old[1])] -= 1
+        if new:
+            deltas[new[0]]["count"] += 1
+            deltas[new[0]]["sum"] += new[1]
+            deltas[new[0]][str(new[1])] += 1
+
+        for property_id, delta in deltas.items():
+            increments = {
+                "rating_count": {"$add": [{"$ifNull": ["$rating_count", 0]}, delta["count"]]},
+                "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", 0]}, delta["sum"]]}
+            }
+            for rating in RATINGS:
+                if delta[str(rating)]:
+                    field = f"rating_histogram.{rating}"
+                    increments[field] = {"$add": [{"$ifNull": [f"${field}", 0]}, delta[str(rating)]]}
+            await db.properties.update_one(
+                {"_id": ObjectId(property_id)},
+                [{"$set": increments}, _average_stage()]
+            )
+            await catalog_engine.refresh(db, property_id)
+
+    async def recompute_all(self, db, batch_size: int = 500) -> int:
+        """Rebuild every property's aggregates from the reviews collection"""
+        totals: Dict[str, dict] = {}
+        pipeline = [
+            {"$match": {"is_approved": True, "property_id": {"$type": "string"}}},
+            {"$group": {"_id": {"property_id": "$property_id", "rating": "$rating"}, "count": {"$sum": 1}}}
+        ]
+        async for row in db.reviews.aggregate(pipeline):
+            property_id, rating = row["_id"]["property_id"], row["_id"]["rating"]
+            if not ObjectId.is_valid(property_id) or rating not in RATINGS:
+                continue
+            fields = totals.setdefault(property_id, empty_rating_fields())
+            fields["rating_count"] += row["count"]
+            fields["rating_sum"] += rating * row["count"]
+            fields["rating_histogram"][str(rating)] += row["count"]
+
+        updated = 0
+        batch = []
+        async for prop in db.properties.find({}, {"_id": 1}):
+            fields = totals.get(str(prop["_id"]), empty_rating_fields())
+            if fields["rating_count"]:
+                fields["rating_avg"] = round(fields["rating_sum"] / fields["rating_count"], 2)
+            batch.append(UpdateOne({"_id": prop["_id"]}, {"$set": fields}))
+            if len(batch) >= batch_size:
+                updated += (await db.properties.bulk_write(batch, ordered=False)).modified_count
+                batch = []
+        if batch:
+            updated += (await db.properties.bulk_write(batch, ordered=False)).modified_count
+        return updated
+
+
+rating_service = RatingService()
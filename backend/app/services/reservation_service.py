@@ -0,0 +1,111 @@
+from bson import ObjectId
+from datetime import datetime, timedelta
+from pymongo.errors import BulkWriteError
+from typing import List
+from app.services.availability_service import ACTIVE_BOOKING_STATUSES, naive_utc
+
+
+class NightsUnavailableError(Exception):
+    """Raised when another booking already holds one of the requested nights"""
+
+
+def nights_between(check_in: datetime, check_out: datetime) -> List[datetime]:
+    """Every night of a stay as a midnight UTC datetime (check-out day excluded)"""
+    first = naive_utc(check_in).replace(hour=0, minute=0, second=0, microsecond=0)
+    last = naive_utc(check_out).replace(hour=0, minute=0, second=0, microsecond=0)
+    nights = []
+    night = first
+    while night < last:
+        nights.append(night)
+        night += timedelta(days=1)
+    # A same-day stay still occupies the check-in night
+    return nights or [first]
+
+
+class ReservationService:
+    """Atomic per-night claims for bookings.
+
+    Each booked night is a document in booking_nights with a unique index on
+    (property_id, night), so two concurrent bookings for the same night cannot
+    both succeed: the database rejects the second insert. Claims are written in
+    a single bulk insert and released when a booking is cancelled or rejected.
+    """
+
+    async def claim(self, db, property_id: ObjectId, booking_id: ObjectId, check_in: datetime, check_out: datetime):
+        """Claim every night of a stay, raising NightsUnavailableError on conflict"""
+        await self._claim_nights(db, property_id, booking_id, nights_between(check_in, check_out))
+
+    async def release(self, db, booking_id: ObjectId):
+        """Release every night held by a booking"""
+        await db.booking_nights.delete_many({"booking_id": ObjectId(booking_id)})
+
+    async def reclaim(
+        self,
+        db,
+        property_id: ObjectId,
+        booking_id: ObjectId,
+        old_check_in: datetime,
+        old_check_out: datetime,
+        new_check_in: datetime,
+        new_check_out: datetime
+    ):
+        """Move a booking to new dates, keeping the old nights if the new ones are taken"""
+        old_nights = set(nights_between(old_check_in, old_check_out))
+        new_nights = set(nights_between(new_check_in, new_check_out))
+
+        # Claim the added nights first so a conflict leaves the booking untouched
+        await self._claim_nights(db, property_id, booking_id, sorted(new_nights - old_nights))
+
+        dropped = sorted(old_nights - new_nights)
+        if dropped:
+            await db.booking_nights.delete_many({
+                "booking_id": ObjectId(booking_id),
+                "night": {"$in": dropped}
+            })
+
+    async def sync_active_bookings(self, db) -> int:
+        """Claim nights for active bookings created before claims existed"""
+        claimed = 0
+        cursor = db.bookings.find(
+            {"status": {"$in": list(ACTIVE_BOOKING_STATUSES)}, "check_out": {"$gt": datetime.utcnow()}},
+            {"property_id": 1, "check_in": 1, "check_out": 1}
+        )
+        async for booking in cursor:
+            if await db.booking_nights.find_one({"booking_id": booking["_id"]}, {"_id": 1}):
+                continue
+            try:
+                await self.claim(db, booking["property_id"], booking["_id"], booking["check_in"], booking["check_out"])
+                claimed += 1
+            except NightsUnavailableError:
+                print(f"Booking {booking['_id']} overlaps another booking, nights not claimed")
+        return claimed
+
+    async def _claim_nights(self, db, property_id: ObjectId, booking_id: ObjectId, nights: List[datetime]):
+        """Insert claim documents for the given nights in one round trip"""
+        if not nights:
+            return
+
+        now = datetime.utcnow()
+        claims = [
+            {
+                "property_id": ObjectId(property_id),
+                "night": night,
+                "booking_id": ObjectId(booking_id),
+                "created_at": now
+            }
+            for night in nights
+        ]
+        try:
+            await db.booking_nights.insert_many(claims, ordered=False)
+        except BulkWriteError as e:
+            # Roll back whatever this attempt did manage to claim
+            await db.booking_nights.delete_many({
+                "booking_id": ObjectId(booking_id),
+                "night": {"$in": nights}
+            })
+            if any(error.get("code") == 11000 for error in e.details.get("writeErrors", [])):
+                raise NightsUnavailableError()
+            raise
+
+
+reservation_service = ReservationService()
@@ -1,24 +1,51 @@
-import requests
 import asyncio
+import httpx
 from app.core.config import settings
-from typing import Optional
+from typing import List, Optional, Tuple
 
 
 class SMSService:
-    def __init__(self):
-        self.api_key = settings.gupshup_api_key
-        self.app_name = settings.gupshup_app_name
-        self.base_url = settings.gupshup_base_url
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        app_name: Optional[str] = None,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        # Overrides let tests point the service at a local stand-in for Gupshup
+        self.api_key = api_key or settings.gupshup_api_key
+        self.app_name = app_name or settings.gupshup_app_name
+        self.base_url = base_url or settings.gupshup_base_url
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
 
-    async def send_sms(self, phone_number: str, message: str) -> bool:
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use inside the event loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"apikey": self.api_key},
+                timeout=httpx.Timeout(settings.sms_timeout_seconds),
+                limits=httpx.Limits(
+                    max_connections=settings.sms_max_connections,
+                    max_keepalive_connections=settings.sms_max_connections
+                ),
+                transport=self._transport
+            )
+            self._semaphore = asyncio.Semaphore(settings.sms_max_concurrency)
+        return self._client
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def send_sms(self, phone_number: str, message: str, timeout: Optional[float] = None) -> bool:
         """Send SMS using Gupshup API"""
         try:
-            url = f"{self.base_url}/msg"
-            
-            headers = {
-                "apikey": self.api_key,
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
+            client = self._get_client()
             
             data = {
                 "channel": "sms",
@@ -28,12 +55,13 @@ class SMSService:
                 "src.name": self.app_name
             }
             
-            # Make async request
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.post(url, headers=headers, data=data)
-            )
+            # Bound the number of in-flight requests so bulk sends cannot flood Gupshup
+            async with self._semaphore:
+                response = await client.post(
+                    "/msg",
+                    data=data,
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+                )
             
             if response.status_code == 202:
                 return True
@@ -45,6 +73,16 @@ class SMSService:
             print(f"Error sending SMS: {e}")
             return False
 
+    async def send_bulk(self, messages: List[Tuple[str, str]], timeout: Optional[float] = None) -> List[bool]:
+        """Send many SMS concurrently over the pooled client.
+
+        messages is a list of (phone_number, message) pairs. Concurrency is
+        capped by SMS_MAX_CONCURRENCY. Returns one result per message, in order.
+        """
+        return list(await asyncio.gather(*(
+            self.send_sms(phone_number, message, timeout=timeout) for phone_number, message in messages
+        )))
+
     async def send_otp_sms(self, phone_number: str, otp: str) -> bool:
         """Send OTP via SMS"""
         message = f"Your Wild Welcome verification code is: {otp}. Valid for 10 minutes."
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+from app.core.config import settings
+
+STATS_ID = "platform"
+STAT_FIELDS = ("available_properties", "total_users", "happy_tenants", "trusted_landlords")
+# Bookings counted as happy tenants
+HAPPY_BOOKING_STATUSES = ("confirmed", "completed")
+
+
+class StatsService:
+    """Platform counters kept in a single platform_stats document.
+
+    Registration, account deletion, property create/update/delete and
+    booking status changes adjust the counters with $inc, so GET /auth/stats
+    is one _id lookup instead of four count_documents over the large
+    collections. Those writes are not transactional with the counters, so a
+    periodic reconcile() recounts from the source collections and corrects
+    any drift.
+    """
+
+    def __init__(self):
+        self._reconcile_task: Optional[asyncio.Task] = None
+
+    async def increment(self, db, **deltas: int):
+        """Apply counter deltas, skipping zeros"""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        await db.platform_stats.update_one(
+            {"_id": STATS_ID},
+            {"$inc": deltas, "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+    async def user_changed(self, db, user_type: str, delta: int):
+        """A user was registered (+1) or deactivated (-1)"""
+        await self.increment(
+            db,
+            total_users=delta,
+            trusted_landlords=delta if user_type == "landlord" else 0
+        )
+
+    async def property_changed(self, db, was_active: bool, is_active: bool):
+        """A property was created, deleted or (de)activated"""
+        await self.increment(db, available_properties=int(is_active) - int(was_active))
+
+    async def booking_status_changed(self, db, old_status: Optional[str], new_status: Optional[str]):
+        """A booking moved between statuses"""
+        await self.increment(
+            db,
+            happy_tenants=int(new_status in HAPPY_BOOKING_STATUSES) - int(old_status in HAPPY_BOOKING_STATUSES)
+        )
+
+    async def get(self, db) -> dict:
+        """Current counters, computing them on first use"""
+        stats = await db.platform_stats.find_one({"_id": STATS_ID})
+        if stats is None:
+            return await self.reconcile(db)
+        return {field: stats.get(field, 0) for field in STAT_FIELDS}
+
+    async def reconcile(self, db) -> dict:
+        """Recount every counter from the source collections"""
+        stats = {
+            "available_properties": await db.properties.count_documents({"is_active": True}),
+            "total_users": await db.users.count_documents({"is_active": True}),
+            "happy_tenants": await db.bookings.count_documents({"status": {"$in": list(HAPPY_BOOKING_STATUSES)}}),
+            "trusted_landlords": await db.users.count_documents({"user_type": "landlord", "is_active": True})
+        }
+        await db.platform_stats.update_one(
+            {"_id": STATS_ID},
+            {"$set": {**stats, "updated_at": datetime.utcnow(), "reconciled_at": datetime.utcnow()}},
+            upsert=True
+        )
+        return stats
+
+    def start(self, db):
+        """Start the periodic reconciliation task"""
+        if self._reconcile_task is None and settings.stats_reconcile_interval_seconds > 0:
+            self._reconcile_task = asyncio.create_task(self._reconcile_loop(db))
+
+    async def stop(self):
+        """Stop the reconciliation task"""
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+            try:
+                await self._reconcile_task
+            except asyncio.CancelledError:
+                pass
+            self._reconcile_task = None
+
+    async def _reconcile_loop(self, db):
+        """Recount on startup and then every stats_reconcile_interval_seconds"""
+        while True:
+            try:
+                await self.reconcile(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Stats reconciliation failed: {e}")
+            await asyncio.sleep(settings.stats_reconcile_interval_seconds)
+
+
+stats_service = StatsService()
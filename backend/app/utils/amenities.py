@@ -0,0 +1,46 @@
+from fastapi import HTTPException, status
+from typing import Iterable
+
+# Bit positions of the amenities in amenities_mask. Append new amenities at the
+# end - reordering would change the meaning of every stored mask.
+AMENITY_ORDER = (
+    "wifi",
+    "parking",
+    "kitchen",
+    "ac",
+    "heating",
+    "washer",
+    "dryer",
+    "tv",
+    "workspace",
+    "balcony",
+    "garden",
+    "pool",
+    "gym",
+    "wildlife_viewing",
+    "photography_equipment",
+    "guided_tours",
+)
+AMENITY_BITS = {name: 1 << position for position, name in enumerate(AMENITY_ORDER)}
+
+
+def amenities_mask(amenities: dict) -> int:
+    """Integer bitmask of the amenities set to True"""
+    mask = 0
+    for name, enabled in (amenities or {}).items():
+        if enabled and name in AMENITY_BITS:
+            mask |= AMENITY_BITS[name]
+    return mask
+
+
+def mask_for(names: Iterable[str]) -> int:
+    """Bitmask for a list of requested amenity names"""
+    mask = 0
+    for name in names:
+        if name not in AMENITY_BITS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown amenity: {name}"
+            )
+        mask |= AMENITY_BITS[name]
+    return mask
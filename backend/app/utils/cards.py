@@ -0,0 +1,52 @@
+import json
+from typing import Optional
+from fastapi import Response
+from app.utils.pagination import NEXT_CURSOR_HEADER
+
+# find() projection for view=card: only the fields a listing card shows
+CARD_PROJECTION = {
+    "title": 1,
+    "property_type": 1,
+    "price_per_night": 1,
+    "images": {"$slice": 1},
+    "location.city": 1,
+    "location.near_park": 1,
+    "rating_avg": 1,
+    "rating_count": 1
+}
+
+# Aggregation equivalent, keeping the score and distance used for cursors
+CARD_STAGE = {
+    "$project": {
+        **{field: 1 for field in CARD_PROJECTION if field != "images"},
+        "images": {"$slice": ["$images", 1]},
+        "score": 1,
+        "distance": 1
+    }
+}
+
+
+def to_card(prop: dict) -> dict:
+    """PropertyCard-shaped dict built straight from a (projected) property document"""
+    location = prop.get("location") or {}
+    images = prop.get("images") or []
+    distance = prop.get("distance")
+    return {
+        "id": str(prop["_id"]),
+        "title": prop.get("title"),
+        "property_type": prop.get("property_type"),
+        "price_per_night": prop.get("price_per_night"),
+        "image": images[0] if images else None,
+        "city": location.get("city"),
+        "near_park": location.get("near_park"),
+        "rating_avg": prop.get("rating_avg", 0.0),
+        "rating_count": prop.get("rating_count", 0),
+        "distance_km": round(distance / 1000, 3) if distance is not None else None
+    }
+
+
+def card_response(content, page_cursor: Optional[str] = None) -> Response:
+    """JSON response for card payloads, skipping response model validation"""
+    headers = {NEXT_CURSOR_HEADER: page_cursor} if page_cursor else None
+    body = json.dumps(content, separators=(",", ":")).encode()
+    return Response(content=body, media_type="application/json", headers=headers)
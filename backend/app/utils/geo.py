@@ -0,0 +1,54 @@
+from fastapi import HTTPException, status
+from typing import Optional, Tuple
+
+
+def geo_point(location: dict) -> Optional[dict]:
+    """GeoJSON point for a location dict, or None if it has no coordinates"""
+    latitude = location.get("latitude")
+    longitude = location.get("longitude")
+    if latitude is None or longitude is None:
+        return None
+    # GeoJSON coordinates are [longitude, latitude]
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def with_geo_point(location: dict) -> dict:
+    """Set (or clear) location.geo from the latitude/longitude fields"""
+    point = geo_point(location)
+    if point:
+        location["geo"] = point
+    else:
+        location.pop("geo", None)
+    return location
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """Parse a "min_lng,min_lat,max_lng,max_lat" bounding box"""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox must be min_lng,min_lat,max_lng,max_lat"
+        )
+
+    if not (-180 <= min_lng < max_lng <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox coordinates are out of range"
+        )
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def bbox_polygon(min_lng: float, min_lat: float, max_lng: float, max_lat: float) -> dict:
+    """GeoJSON polygon covering a bounding box"""
+    return {
+        "type": "Polygon",
+        "coordinates": [[
+            [min_lng, min_lat],
+            [max_lng, min_lat],
+            [max_lng, max_lat],
+            [min_lng, max_lat],
+            [min_lng, min_lat]
+        ]]
+    }
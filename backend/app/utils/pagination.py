@@ -0,0 +1,91 @@
+import base64
+from typing import Any, List, Optional, Tuple
+from bson import ObjectId, json_util
+from fastapi import HTTPException, status
+from pymongo import ASCENDING
+
+# Header used to hand the next page cursor back on list endpoints
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _get_field(document: dict, field: str) -> Any:
+    """Read a (possibly dotted) field from a document"""
+    value = document
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def encode_cursor(sort_value: Any, doc_id: ObjectId) -> str:
+    """Encode the sort key and _id of the last document on a page into an opaque cursor"""
+    raw = json_util.dumps([sort_value, doc_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ObjectId]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, doc_id = json_util.loads(base64.urlsafe_b64decode(padded).decode())
+        if not isinstance(doc_id, ObjectId):
+            raise ValueError("cursor does not end in an ObjectId")
+        return sort_value, doc_id
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def sort_spec(sort_field: str, direction: int) -> List[Tuple[str, int]]:
+    """Sort specification for keyset pagination (sort key, then _id as tiebreaker)"""
+    if sort_field == "_id":
+        return [("_id", direction)]
+    return [(sort_field, direction), ("_id", direction)]
+
+
+def apply_cursor(filter_query: dict, sort_field: str, direction: int, cursor: Optional[str]) -> dict:
+    """Restrict filter_query to documents that sort after the cursor position.
+
+    The range predicate lets MongoDB seek straight to the next page through
+    the sort index instead of walking and discarding earlier documents.
+    """
+    if not cursor:
+        return filter_query
+
+    sort_value, doc_id = decode_cursor(cursor)
+    op = "$gt" if direction == ASCENDING else "$lt"
+
+    if sort_field == "_id":
+        after = {"_id": {op: doc_id}}
+    elif sort_value is None:
+        # Missing values sort before every other value, and {field: None}
+        # matches them, so the next page continues through the missing ones
+        # by _id and, ascending, then on to every present value
+        after = {sort_field: None, "_id": {op: doc_id}}
+        if direction == ASCENDING:
+            after = {"$or": [{sort_field: {"$ne": None}}, after]}
+    else:
+        after = {
+            "$or": [
+                {sort_field: {op: sort_value}},
+                {sort_field: sort_value, "_id": {op: doc_id}}
+            ]
+        }
+        if direction != ASCENDING:
+            # $lt never matches a missing value, but those come last when descending
+            after["$or"].append({sort_field: None})
+
+    if not filter_query:
+        return after
+    return {"$and": [filter_query, after]}
+
+
+def next_cursor(documents: List[dict], sort_field: str, limit: int) -> Optional[str]:
+    """Cursor for the page after documents, or None if this was the last page"""
+    if len(documents) < limit:
+        return None
+    last = documents[-1]
+    return encode_cursor(_get_field(last, sort_field), last["_id"])
@@ -0,0 +1,35 @@
+import re
+import unicodedata
+from typing import Optional
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_key(value: Optional[str]) -> str:
+    """Lowercase, accent-folded, whitespace-collapsed form used for exact and prefix matching"""
+    if not value:
+        return ""
+    folded = unicodedata.normalize("NFKD", value)
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return _WHITESPACE_RE.sub(" ", folded.casefold()).strip()
+
+
+# Location fields stored with a normalized <field>_key for exact-match filters
+LOCATION_KEY_FIELDS = ("city", "near_park", "address")
+
+
+def with_location_keys(location: dict) -> dict:
+    """Set (or clear) the normalized city, park and address keys used by the location filters"""
+    for field in LOCATION_KEY_FIELDS:
+        key = normalize_key(location.get(field))
+        if key:
+            location[f"{field}_key"] = key
+        else:
+            location.pop(f"{field}_key", None)
+    return location
+
+
+def location_filter(value: str) -> dict:
+    """Filter clause matching a location filter value against the city or the address"""
+    key = normalize_key(value)
+    return {"$or": [{"location.city_key": key}, {"location.address_key": key}]}
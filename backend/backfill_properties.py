@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Backfill derived property fields for Wild Welcome
+Recomputes fields that the API maintains on write for properties created
+before those fields existed.
+
+Usage:
+    python backfill_properties.py          # run every backfill
+    python backfill_properties.py geo      # run selected backfills
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.utils.geo import geo_point
+from app.utils.text import LOCATION_KEY_FIELDS, normalize_key
+from app.utils.amenities import amenities_mask
+from app.services.reservation_service import reservation_service
+from app.auth.sessions import hash_refresh_token
+from app.services.rating_service import rating_service
+
+BATCH_SIZE = 500
+
+
+async def backfill_geo(db) -> int:
+    """Store location.geo GeoJSON points from latitude/longitude"""
+    updated = 0
+    batch = []
+    cursor = db.properties.find({}, {"location": 1})
+    async for prop in cursor:
+        point = geo_point(prop.get("location") or {})
+        if point:
+            batch.append(UpdateOne({"_id": prop["_id"]}, {"$set": {"location.geo": point}}))
+        else:
+            batch.append(UpdateOne({"_id": prop["_id"]}, {"$unset": {"location.geo": ""}}))
+        if len(batch) >= BATCH_SIZE:
+            updated += (await db.properties.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await db.properties.bulk_write(batch, ordered=False)).modified_count
+    return updated
+
+
+async def backfill_location_keys(db) -> int:
+    """Store the normalized location.city_key, location.near_park_key and location.address_key"""
+    updated = 0
+    batch = []
+    cursor = db.properties.find({}, {"location": 1})
+    async for prop in cursor:
+        location = prop.get("location") or {}
+        keys = {f"location.{field}_key": normalize_key(location.get(field)) for field in LOCATION_KEY_FIELDS}
+        update = {}
+        if any(keys.values()):
+            update["$set"] = {field: key for field, key in keys.items() if key}
+        if not all(keys.values()):
+            update["$unset"] = {field: "" for field, key in keys.items() if not key}
+        batch.append(UpdateOne({"_id": prop["_id"]}, update))
+        if len(batch) >= BATCH_SIZE:
+            updated += (await db.properties.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await db.properties.bulk_write(batch, ordered=False)).modified_count
+    return updated
+
+
+async def backfill_amenities_mask(db) -> int:
+    """Store the amenities_mask bitmask from the amenities booleans"""
+    updated = 0
+    batch = []
+    cursor = db.properties.find({}, {"amenities": 1})
+    async for prop in cursor:
+        batch.append(UpdateOne(
+            {"_id": prop["_id"]},
+            {"$set": {"amenities_mask": amenities_mask(prop.get("amenities") or {})}}
+        ))
+        if len(batch) >= BATCH_SIZE:
+            updated += (await db.properties.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await db.properties.bulk_write(batch, ordered=False)).modified_count
+    return updated
+
+
+async def backfill_nights(db) -> int:
+    """Claim booking_nights for active bookings made before night claims existed"""
+    return await reservation_service.sync_active_bookings(db)
+
+
+async def backfill_sessions(db) -> int:
+    """Move refresh tokens stored on user documents into the sessions collection"""
+    migrated = 0
+    now = datetime.utcnow()
+    cursor = db.users.find(
+        {"refresh_token": {"$exists": True}},
+        {"refresh_token": 1, "refresh_token_expires_at": 1}
+    )
+    async for user in cursor:
+        expires_at = user.get("refresh_token_expires_at")
+        if user.get("refresh_token") and expires_at and expires_at > now:
+            await db.sessions.update_one(
+                {"token_hash": hash_refresh_token(user["refresh_token"])},
+                {
+                    "$setOnInsert": {
+                        "user_id": user["_id"],
+                        "user_agent": "",
+                        "ip_address": None,
+                        "created_at": now,
+                        "last_used_at": now,
+                        "expires_at": expires_at
+                    }
+                },
+                upsert=True
+            )
+            migrated += 1
+        await db.users.update_one(
+            {"_id": user["_id"]},
+            {"$unset": {"refresh_token": "", "refresh_token_expires_at": ""}}
+        )
+    return migrated
+
+
+async def backfill_ratings(db) -> int:
+    """Recompute rating_avg, rating_count and rating_histogram from approved reviews"""
+    return await rating_service.recompute_all(db, batch_size=BATCH_SIZE)
+
+
+BACKFILLS = {
+    "geo": backfill_geo,
+    "location_keys": backfill_location_keys,
+    "amenities_mask": backfill_amenities_mask,
+    "nights": backfill_nights,
+    "sessions": backfill_sessions,
+    "ratings": backfill_ratings,
+}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Backfill derived property fields")
+    parser.add_argument("steps", nargs="*", choices=list(BACKFILLS), help="Backfills to run (default: all)")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    db = client[settings.database_name]
+
+    try:
+        for name in args.steps or list(BACKFILLS):
+            updated = await BACKFILLS[name](db)
+            print(f"✅ {name}: updated {updated} records")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Login storm benchmark for Wild Welcome
+Fires concurrent logins at a running API while probing an unrelated endpoint,
+and reports login throughput plus the probe's latency percentiles. With
+password hashing on the event loop the probe latency tracks bcrypt time;
+with hashing offloaded it should stay flat.
+
+Usage:
+    python bench_login.py --email user@example.com --password secret
+    python bench_login.py --base-url http://localhost:8000 --concurrency 32 --duration 20
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples: list, p: float) -> float:
+    """p-th percentile (0-100) of a list of samples"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+async def login_worker(client: httpx.AsyncClient, args, deadline: float, results: dict):
+    """Log in repeatedly until the deadline"""
+    while time.perf_counter() < deadline:
+        response = await client.post("/api/auth/login", json={"email": args.email, "password": args.password})
+        key = "ok" if response.status_code == 200 else "failed"
+        results[key] += 1
+
+
+async def probe_worker(client: httpx.AsyncClient, args, deadline: float, latencies: list):
+    """Hit an unrelated endpoint at a steady rate and record latency"""
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await client.get(args.probe_path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(args.probe_interval)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput and event-loop responsiveness")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent login clients")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds to run")
+    parser.add_argument("--probe-path", default="/api/health")
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    results = {"ok": 0, "failed": 0}
+    latencies = []
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        # Baseline probe latency with no load
+        baseline = []
+        for _ in range(20):
+            started = time.perf_counter()
+            await client.get(args.probe_path)
+            baseline.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            probe_worker(client, args, deadline, latencies),
+            *(login_worker(client, args, deadline, results) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    print("="*60)
+    print(f"🔐 Logins: {results['ok']} ok, {results['failed']} failed in {elapsed:.1f}s "
+          f"({results['ok'] / elapsed:.1f}/s at concurrency {args.concurrency})")
+    print(f"📡 {args.probe_path} baseline: p50 {statistics.median(baseline):.1f} ms, p99 {percentile(baseline, 99):.1f} ms")
+    if latencies:
+        print(f"📡 {args.probe_path} under storm: p50 {statistics.median(latencies):.1f} ms, "
+              f"p99 {percentile(latencies, 99):.1f} ms, max {max(latencies):.1f} ms ({len(latencies)} probes)")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Google's ID token signing certificates
+Serves GET /certs in the same {key_id: PEM certificate} shape as
+https://www.googleapis.com/oauth2/v1/certs, signed by a freshly generated
+RSA key, with a Cache-Control max-age. GoogleCertCache can then be exercised
+without calling Google, and --check runs its caching scenarios against it.
+
+Usage:
+    python google_certs_stub.py [--port 8026] [--max-age 3600]
+    GOOGLE_CERTS_URL=http://localhost:8026/certs GOOGLE_CLIENT_ID=stub-client-id.apps.googleusercontent.com \
+        python -m uvicorn app.main:app
+    curl "http://localhost:8026/token?email=guest@example.com"   # ID token to post to /api/auth/google
+    python google_certs_stub.py --check   # verify, key rotation and max-age expiry
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt
+from google.auth import jwt as google_jwt
+
+AUDIENCE = "stub-client-id.apps.googleusercontent.com"
+
+
+class KeySet:
+    """RSA signing keys with self-signed certificates, newest last"""
+
+    def __init__(self):
+        self.keys = []  # (key_id, private key PEM, certificate PEM)
+        self.lock = threading.Lock()
+        self.rotate()
+
+    def rotate(self) -> str:
+        """Add a new signing key, as Google does on rotation, and return its key id"""
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "stub.googleapis.com")])
+        now = datetime.utcnow()
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=1))
+            .sign(key, hashes.SHA256())
+        )
+        key_id = uuid.uuid4().hex
+        private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ).decode()
+        with self.lock:
+            self.keys.append((key_id, private_pem, cert.public_bytes(serialization.Encoding.PEM).decode()))
+        return key_id
+
+    def certs(self) -> dict:
+        """Certificate set as served by /certs"""
+        with self.lock:
+            return {key_id: cert for key_id, _, cert in self.keys}
+
+    def sign(self, claims: dict, key_id: str = None) -> str:
+        """ID token for claims, signed with key_id (default: newest key)"""
+        with self.lock:
+            key_id, private_pem, _ = next(k for k in reversed(self.keys) if key_id in (None, k[0]))
+        now = int(time.time())
+        payload = {
+            "iss": "https://accounts.google.com",
+            "aud": AUDIENCE,
+            "iat": now,
+            "exp": now + 600,
+            **claims
+        }
+        return google_jwt.encode(crypt.RSASigner.from_string(private_pem, key_id), payload).decode()
+
+
+class CertsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    key_set: KeySet = None
+    max_age = 3600
+    requests = 0
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path.rstrip("/") == "/token":
+            # Convenience for manual testing: an ID token for ?email=...
+            email = parse_qs(query).get("email", ["guest@example.com"])[0]
+            token = self.key_set.sign({"sub": email, "email": email, "email_verified": True, "name": email})
+            return self._reply(200, {"id_token": token})
+        if path.rstrip("/") != "/certs":
+            return self._reply(404, {"error": "Not found"})
+        CertsHandler.requests += 1
+        self._reply(200, self.key_set.certs())
+
+    def _reply(self, status_code: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Cache-Control", f"public, max-age={self.max_age}, must-revalidate, no-transform")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int, max_age: int) -> ThreadingHTTPServer:
+    """Start the stand-in on a background thread (port 0 picks a free port)"""
+    CertsHandler.key_set = KeySet()
+    CertsHandler.max_age = max_age
+    server = ThreadingHTTPServer(("127.0.0.1", port), CertsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def check(server: ThreadingHTTPServer) -> bool:
+    """Exercise GoogleCertCache against the stand-in and report each scenario"""
+    from app.auth.google_certs import GoogleCertCache
+
+    key_set = CertsHandler.key_set
+    cache = GoogleCertCache(certs_url=f"http://127.0.0.1:{server.server_port}/certs")
+    results = []
+
+    def report(name: str, passed: bool, detail: str = ""):
+        results.append(passed)
+        print(f"{'PASS' if passed else 'FAIL'}  {name}{f' ({detail})' if detail else ''}")
+
+    # 1. A token signed by a served key verifies, with one fetch
+    claims = await cache.verify(key_set.sign({"sub": "1", "email": "guest@example.com"}), AUDIENCE)
+    report("valid token verifies", claims["email"] == "guest@example.com" and cache.fetch_count == 1,
+           f"fetches={cache.fetch_count}")
+
+    # A second verification is served from the cache
+    await cache.verify(key_set.sign({"sub": "2"}), AUDIENCE)
+    report("cached certificates reused", cache.fetch_count == 1, f"fetches={cache.fetch_count}")
+
+    # A wrong audience is rejected
+    try:
+        await cache.verify(key_set.sign({"sub": "3", "aud": "someone-else"}), AUDIENCE)
+        report("wrong audience rejected", False)
+    except ValueError:
+        report("wrong audience rejected", True)
+
+    # 2. A token from a rotated-in key id forces one refresh, then verifies
+    new_key_id = key_set.rotate()
+    claims = await cache.verify(key_set.sign({"sub": "4"}, new_key_id), AUDIENCE)
+    report("unknown kid triggers refresh", claims["sub"] == "4" and cache.fetch_count == 2,
+           f"fetches={cache.fetch_count}")
+
+    # 3. Once max-age passes, the next lookup fetches again
+    await asyncio.sleep(CertsHandler.max_age + 0.5)
+    await cache.verify(key_set.sign({"sub": "5"}), AUDIENCE)
+    report("re-fetch after max-age expiry", cache.fetch_count == 3, f"fetches={cache.fetch_count}")
+
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Google signing certificate stand-in")
+    parser.add_argument("--port", type=int, default=8026)
+    parser.add_argument("--max-age", type=int, default=3600, help="Cache-Control max-age in seconds")
+    parser.add_argument("--check", action="store_true", help="Run GoogleCertCache scenarios and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        server = serve(0, min(args.max_age, 2))
+        passed = asyncio.run(check(server))
+        server.shutdown()
+        sys.exit(0 if passed else 1)
+
+    server = serve(args.port, args.max_age)
+    print(f"Google certs stand-in listening on http://127.0.0.1:{args.port}/certs")
+    print(f"Tokens from /token?email=... use audience {AUDIENCE}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gupshup SMS API
+Accepts POST /msg like Gupshup does and answers 202, so SMSService can be
+exercised without sending real messages.
+
+Usage:
+    python gupshup_stub.py [--port 8025] [--latency 0.05]
+    GUPSHUP_BASE_URL=http://localhost:8025 python -m uvicorn app.main:app
+"""
+
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class GupshupHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    latency = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode())
+
+        if self.path.rstrip("/") != "/msg":
+            return self._reply(404, {"status": "error", "message": "Not found"})
+        if not self.headers.get("apikey"):
+            return self._reply(401, {"status": "error", "message": "Authentication Failed"})
+        if not form.get("destination") or not form.get("message"):
+            return self._reply(400, {"status": "error", "message": "Invalid destination or message"})
+
+        time.sleep(self.latency)
+        print(f"📱 SMS to {form['destination'][0]}: {form['message'][0][:60]}")
+        self._reply(202, {"status": "submitted", "messageId": str(uuid.uuid4())})
+
+    def _reply(self, status_code: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Gupshup /msg stand-in")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    args = parser.parse_args()
+
+    GupshupHandler.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), GupshupHandler)
+    print(f"Gupshup stand-in listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
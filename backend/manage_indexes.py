@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Index management for Wild Welcome
+Builds the indexes declared in app/database/indexes.py ahead of a deploy and
+reports drift between the registry and the live database.
+
+Usage:
+    python manage_indexes.py            # build missing indexes
+    python manage_indexes.py --check    # report drift, exit 1 if any
+    python manage_indexes.py --rebuild  # also drop and rebuild mismatched indexes
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.config import settings
+from app.database.indexes import ensure_indexes, get_index_drift
+
+
+def print_drift(drift: dict):
+    """Print a drift report"""
+    if not drift:
+        print("✅ All indexes match the registry")
+        return
+
+    for collection_name, report in drift.items():
+        print(f"📂 {collection_name}")
+        for kind in ("missing", "mismatched", "extra"):
+            for name in report[kind]:
+                print(f"   • {kind}: {name}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Build and check Wild Welcome MongoDB indexes")
+    parser.add_argument("--check", action="store_true", help="Only report drift, do not build")
+    parser.add_argument("--rebuild", action="store_true", help="Drop and rebuild indexes whose options changed")
+    args = parser.parse_args()
+
+    # Connect directly so startup index creation does not run twice
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    db = client[settings.database_name]
+
+    try:
+        if not args.check:
+            created = await ensure_indexes(db, drop_mismatched=args.rebuild)
+            for collection_name, names in created.items():
+                print(f"🔨 {collection_name}: built {', '.join(names)}")
+
+        drift = await get_index_drift(db)
+        print_drift(drift)
+
+        # Extra indexes are reported but do not fail the check
+        has_drift = any(report["missing"] or report["mismatched"] for report in drift.values())
+        return 1 if has_drift else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))